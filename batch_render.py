@@ -0,0 +1,92 @@
+"""
+Render many news or quote posts at once across worker processes.
+
+    python batch_render.py news posts.json     # [{"news_item": {...}, "analysis": {...}}, ...]
+    python batch_render.py quotes quotes.json  # ["quote text", ...]
+
+Pillow rendering is CPU-bound, so carousel and backfill batches are spread
+over a ProcessPoolExecutor. Each worker loads the fonts and static
+templates once when it starts, and results are yielded as posts finish.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import RENDER_PROCESSES
+import news_post_generator as news_posts
+import quote_post_generator as quote_posts
+
+def _worker_count(max_workers, jobs):
+    workers = max_workers or RENDER_PROCESSES or os.cpu_count() or 1
+    return max(1, min(workers, jobs))
+
+def _render_batch(jobs, initializer, max_workers=None):
+    """Run (fn, args) jobs in a process pool, yield (index, result) in completion order."""
+    if not jobs:
+        return
+    pool = ProcessPoolExecutor(max_workers=_worker_count(max_workers, len(jobs)), initializer=initializer)
+    try:
+        futures = {pool.submit(fn, *args): index for index, (fn, args) in enumerate(jobs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                yield index, future.result()
+            except Exception as e:
+                print(f"ERROR : batch render of item {index} failed: {e}")
+                yield index, None
+    finally:
+        # Also runs when the caller stops iterating early: drop what has not started
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def render_news_batch(pairs, max_workers=None, first_post_number=1, to_disk=None):
+    """
+    Render (news_item, analysis_result) pairs in parallel.
+    Yields (index into pairs, post) as each post finishes, the post being its
+    encoded bytes or, with `to_disk`, its file; None if it failed.
+    """
+    jobs = [(news_posts.create_instagram_post, (first_post_number + i, news_item, analysis_result, None, to_disk))
+            for i, (news_item, analysis_result) in enumerate(pairs)]
+    yield from _render_batch(jobs, news_posts.warm_news_renderer, max_workers)
+
+def render_quote_batch(quotes, max_workers=None, output_dir="posts", to_disk=None):
+    """
+    Render quote texts in parallel.
+    Yields (index into quotes, post) as each post finishes, the post being its
+    encoded bytes or, with `to_disk`, its file; None if it failed.
+    """
+    jobs = [(quote_posts.create_quote_post, (quote, output_dir, quote_posts.DEFAULT_LOGO_PATH, i, to_disk))
+            for i, quote in enumerate(quotes)]
+    yield from _render_batch(jobs, quote_posts.warm_quote_renderer, max_workers)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=["news", "quotes"])
+    parser.add_argument("input", help="JSON file with the posts to render")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: RENDER_PROCESSES)")
+    args = parser.parse_args()
+
+    with open(args.input, encoding="utf-8") as f:
+        items = json.load(f)
+
+    start = time.perf_counter()
+    if args.kind == "news":
+        results = render_news_batch([(item["news_item"], item["analysis"]) for item in items], args.workers,
+                                    to_disk=True)
+    else:
+        results = render_quote_batch(items, args.workers, to_disk=True)
+
+    failed = 0
+    for index, filename in results:
+        if filename is None:
+            failed += 1
+        else:
+            print(f"INFO: [{index}] {filename}")
+    print(f"INFO: rendered {len(items) - failed}/{len(items)} posts in {time.perf_counter() - start:.1f}s "
+          f"with {_worker_count(args.workers, len(items))} processes")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
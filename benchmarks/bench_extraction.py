@@ -0,0 +1,92 @@
+"""
+Compare article extraction engines on the saved fixture pages.
+
+    python benchmarks/bench_extraction.py [--runs 20]
+
+For each page and engine it reports the median wall time, the Python heap
+peak (tracemalloc), the number of characters extracted and the RSS growth
+of a fresh process extracting the page with its <body> repeated --scale
+times. The RSS figure also counts libxml2's C allocations, which
+tracemalloc cannot see, and the scaling keeps it above allocator noise.
+"""
+import os
+import sys
+import time
+import glob
+import argparse
+import resource
+import statistics
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.article_extractor import EXTRACTORS  # noqa: E402
+
+PAGES_DIR = os.path.join(ROOT, "benchmarks", "fixtures", "pages")
+
+def load_page(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def time_engine(engine, html, runs):
+    extract = EXTRACTORS[engine]
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        text = extract(html)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), len(text)
+
+def heap_peak(engine, html):
+    tracemalloc.start()
+    EXTRACTORS[engine](html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def scale_page(html, times):
+    """Repeat the contents of <body> to get a bigger page with the same shape."""
+    start = html.index(b">", html.index(b"<body")) + 1
+    end = html.rindex(b"</body>")
+    return html[:start] + html[start:end] * times + html[end:]
+
+def rss_growth(engine, path, scale):
+    """Run one extraction in a child process and return its max RSS growth in KB."""
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", engine, path, "--scale", str(scale)],
+        capture_output=True, text=True, check=True,
+    )
+    return int(out.stdout.strip())
+
+def child(engine, path, scale):
+    html = scale_page(load_page(path), scale)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    EXTRACTORS[engine](html)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(after - before)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--scale", type=int, default=20, help="body repeats for the RSS measurement")
+    parser.add_argument("--child", nargs=2, metavar=("ENGINE", "PAGE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.scale)
+        return
+
+    print(f"RSS growth measured on pages scaled x{args.scale}")
+    print(f"{'page':<20} {'engine':<6} {'KB in':>7} {'median ms':>10} {'heap KB':>9} {'RSS +KB':>9} {'chars out':>10}")
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))):
+        html = load_page(path)
+        for engine in EXTRACTORS:
+            median, chars = time_engine(engine, html, args.runs)
+            print(f"{os.path.basename(path):<20} {engine:<6} {len(html) // 1024:>7} "
+                  f"{median * 1000:>10.2f} {heap_peak(engine, html) // 1024:>9} "
+                  f"{rss_growth(engine, path, args.scale):>9} {chars:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Microbenchmark for the news post layout search.
+
+    python benchmarks/bench_font_sizing.py [--runs 20]
+
+Times find_optimal_font_size (heading) and find_bullet_font against the
+previous implementation, a linear scan over sizes that re-measures every
+trial line with draw.textlength.
+"cold" clears the per-font word width cache before each run, "warm" keeps
+it, as for every post after the first in one process. Both versions must
+pick the same sizes and lines.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # font paths are relative to the repo root
+
+from PIL import Image, ImageDraw  # noqa: E402
+from utils import font_registry  # noqa: E402
+from utils.font_registry import get_font  # noqa: E402
+import news_post_generator as npg  # noqa: E402
+
+HEADINGS = [
+    "MARKETS RALLY",
+    "CEASEFIRE TALKS RESUME AFTER OVERNIGHT COLLAPSE IN THE CAPITAL",
+    "CENTRAL BANK SURPRISES WITH HALF-POINT CUT AS GROWTH STALLS AND UNEMPLOYMENT CLIMBS FOR A FOURTH MONTH",
+]
+BULLETS = [
+    ["Officials met for hours while analysts warned markets could react sharply.",
+     "Trade volumes fell for a third month as energy prices climbed.",
+     "Diplomats described the meeting as constructive but declined to give details."],
+    ["A single much longer bullet point that keeps going with details about the agreement, the parties "
+     "involved, the timeline for implementation, the expected effects on prices and the open questions "
+     "that remain for negotiators over the coming weeks."] * 2 + ["Short point."] * 2,
+]
+
+# ----------------- Previous implementation -----------------
+def legacy_wrap(draw, text, font, max_width):
+    words = text.split()
+    if not words:
+        return []
+    lines, cur = [], words[0]
+    for w in words[1:]:
+        trial = f"{cur} {w}"
+        if draw.textlength(trial, font=font) <= max_width:
+            cur = trial
+        else:
+            lines.append(cur)
+            cur = w
+    lines.append(cur)
+    return lines
+
+def legacy_find_optimal_font_size(draw, text, font_path, max_width, max_height, min_size, max_size,
+                                  max_lines=None, line_spacing=12):
+    for size in range(max_size, min_size - 1, -1):
+        font = get_font(font_path, size)
+        lines = legacy_wrap(draw, text, font, max_width)
+        if max_lines and len(lines) > max_lines:
+            continue
+        if npg.multiline_height(draw, lines, font, line_spacing) <= max_height:
+            return size, lines
+    return min_size, []
+
+def legacy_measure_bullets(draw, points, font, max_width, line_spacing=12, between_bullets=20, bullet="• "):
+    bullet_width = draw.textlength(bullet, font=font)
+    all_wrapped, total_h = [], 0
+    for idx, pt in enumerate(points):
+        wrapped = legacy_wrap(draw, pt, font, max_width - bullet_width)
+        all_wrapped.append(wrapped)
+        total_h += npg.multiline_height(draw, wrapped, font, line_spacing)
+        if idx < len(points) - 1:
+            total_h += between_bullets
+    return all_wrapped, total_h, bullet_width
+
+def legacy_bullet_size(draw, points, cfg, max_width, remaining_height):
+    """The bullet shrink loop of calculate_dynamic_layout, one point at a time."""
+    size = cfg['bullet_max']
+    wrapped, height, _ = legacy_measure_bullets(draw, points, get_font(cfg['bullet_path'], size), max_width)
+    while height > remaining_height and size > cfg['bullet_min']:
+        size -= 1
+        wrapped, height, _ = legacy_measure_bullets(draw, points, get_font(cfg['bullet_path'], size), max_width)
+    return size, wrapped
+
+def current_bullet_size(draw, points, cfg, max_width, remaining_height):
+    font, wrapped, _, _ = npg.find_bullet_font(draw, points, cfg, max_width, remaining_height)
+    return font.size, wrapped
+
+def run_case(draw, heading_fn, bullet_fn, cfg):
+    results = []
+    for heading in HEADINGS:
+        for max_height in (120, 180, 240):
+            results.append(heading_fn(draw, heading, cfg['heading_path'], 960, max_height,
+                                      cfg['heading_min'], cfg['heading_max'], max_lines=3, line_spacing=15))
+    for points in BULLETS:
+        for remaining in (200, 300, 400):
+            results.append(bullet_fn(draw, points, cfg, 960, remaining))
+    return results
+
+def bench(label, heading_fn, bullet_fn, cfg, draw, runs, cold):
+    timings = []
+    for _ in range(runs):
+        if cold:
+            font_registry._word_widths.clear()
+        start = time.perf_counter()
+        results = run_case(draw, heading_fn, bullet_fn, cfg)
+        timings.append(time.perf_counter() - start)
+    print(f"{label:<22} median {statistics.median(timings) * 1000:8.2f} ms   min {min(timings) * 1000:8.2f} ms")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    draw = ImageDraw.Draw(Image.new("RGBA", (1080, 1080)))
+    cfg = npg.FONTS_CONFIG
+    npg.preload_news_fonts()  # font parsing is not what is measured here
+
+    legacy = bench("legacy linear scan", legacy_find_optimal_font_size, legacy_bullet_size, cfg, draw, args.runs, False)
+    cold = bench("binary search (cold)", npg.find_optimal_font_size, current_bullet_size, cfg, draw, args.runs, True)
+    warm = bench("binary search (warm)", npg.find_optimal_font_size, current_bullet_size, cfg, draw, args.runs, False)
+    same = legacy == cold == warm
+    print("results identical to legacy:", same)
+    if not same:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
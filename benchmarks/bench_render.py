@@ -0,0 +1,265 @@
+"""
+Offline benchmark of the post rendering and layout stages.
+
+    python benchmarks/bench_render.py [--runs 5] [--no-rss] [--tolerance 0.25] [--save-baseline]
+
+Cases are the fixture posts in fixtures/posts.json (short and long
+headings, 2-4 bullets, no image), the first of them with a huge 6000px
+JPEG instead of its image, and a quote post. Images are read from
+fixtures/images through decode_image, so nothing touches the network.
+
+For each case and stage it reports the median wall time, the Python heap
+peak (tracemalloc) and the peak RSS growth of a fresh process running the
+stage once after its setup (on Linux the kernel's peak counter is reset
+after the setup). Pillow's pixel buffers only show up in the RSS figure.
+Stages with no image to decode are skipped.
+
+The results are compared with baselines/bench_render.json. A stage more
+than --tolerance slower or bigger than its baseline is flagged, and the
+script then exits 1. Timings depend on the machine, so rerun with
+--save-baseline before comparing on different hardware.
+"""
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # font and logo paths are relative to the repo root
+
+from PIL import Image, ImageDraw  # noqa: E402
+import news_post_generator as npg  # noqa: E402
+import quote_post_generator as qpg  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+IMAGES_DIR = os.path.join(FIXTURES_DIR, "images")
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baselines", "bench_render.json")
+HUGE_IMAGE = "huge.jpg"  # generated from landscape.jpg into the temp dir on first use
+HUGE_SIZE = (6000, 3375)
+TARGET_SIZE = (npg.POST_SIZE[0], int(npg.POST_SIZE[1] * 0.40))  # box prepare_post_canvas fits images into
+QUOTE = "Discipline is choosing\n{what you want most}\nover what you want now."
+NOISE_MS = 1.0   # differences below these are never flagged
+NOISE_KB = 256
+
+# ----------------- Fixtures -----------------
+def image_bytes(name):
+    if not name:
+        return None
+    if name == HUGE_IMAGE:
+        path = os.path.join(tempfile.gettempdir(), f"bench_render_{HUGE_SIZE[0]}x{HUGE_SIZE[1]}.jpg")
+        if not os.path.exists(path):
+            Image.open(os.path.join(IMAGES_DIR, "landscape.jpg")).resize(HUGE_SIZE).save(path, quality=85)
+    else:
+        path = os.path.join(IMAGES_DIR, name)
+    with open(path, "rb") as f:
+        return f.read()
+
+def load_fixture_image(name, target_size=None):
+    """Stand-in for download_image: `urlToImage` names a fixture image."""
+    data = image_bytes(name)
+    return npg.decode_image(data, target_size) if data else None
+
+def load_cases():
+    with open(os.path.join(FIXTURES_DIR, "posts.json"), encoding="utf-8") as f:
+        posts = json.load(f)
+    huge = dict(posts[0], name="huge_image", news_item=dict(posts[0]["news_item"], urlToImage=HUGE_IMAGE))
+    cases = {post["name"]: post for post in posts + [huge]}
+    cases["quote"] = {"name": "quote", "quote": QUOTE}
+    return cases
+
+# ----------------- Stages -----------------
+def setup(case):
+    """Everything a stage needs that is not part of what it measures."""
+    if "quote" in case:
+        qpg.warm_quote_renderer()
+        return {"quote": case["quote"]}
+    npg.warm_news_renderer()
+    news_item, analysis = case["news_item"], case["analysis"]
+    canvas = npg.prepare_post_canvas(news_item)
+    heading = npg.format_heading(analysis["heading"])
+    pointers = [p.strip("{}").strip() for p in analysis["pointers"][:4]]
+    heading_layout = npg.calculate_heading_layout(canvas["draw"], heading, canvas["fonts_config"],
+                                                  canvas["dimensions"])
+    return {
+        "news_item": news_item,
+        "analysis": analysis,
+        "image": image_bytes(news_item.get("urlToImage")),
+        "draw": ImageDraw.Draw(Image.new("RGBA", npg.POST_SIZE)),
+        "canvas": canvas,
+        "heading": heading,
+        "pointers": pointers,
+        "heading_layout": heading_layout,
+    }
+
+def stage_decode(ctx):
+    return npg.decode_image(ctx["image"], TARGET_SIZE)
+
+def stage_canvas(ctx):
+    return npg.prepare_post_canvas(ctx["news_item"])
+
+def stage_font_size(ctx):
+    cfg, hl = npg.FONTS_CONFIG, ctx["heading_layout"]
+    return npg.find_optimal_font_size(ctx["draw"], ctx["heading"], cfg['heading_path'], hl['max_text_width'],
+                                      int(hl['available_height'] * 0.35), cfg['heading_min'],
+                                      cfg['heading_max'], max_lines=3, line_spacing=15)
+
+def stage_layout(ctx):
+    canvas = ctx["canvas"]
+    return npg.calculate_dynamic_layout(canvas["draw"], ctx["heading"], ctx["pointers"], canvas["fonts_config"],
+                                        canvas["dimensions"])
+
+def stage_post(ctx):
+    return npg.create_instagram_post(0, ctx["news_item"], ctx["analysis"], to_disk=False)
+
+def stage_quote(ctx):
+    return qpg.create_quote_post(ctx["quote"], to_disk=False)
+
+NEWS_STAGES = {
+    "decode": stage_decode,
+    "canvas": stage_canvas,
+    "font_size": stage_font_size,
+    "layout": stage_layout,
+    "post": stage_post,
+}
+QUOTE_STAGES = {"quote": stage_quote}
+
+def stages_for(case, ctx):
+    if "quote" in case:
+        return QUOTE_STAGES
+    return {name: fn for name, fn in NEWS_STAGES.items() if name != "decode" or ctx["image"]}
+
+# ----------------- Measurements -----------------
+def time_stage(fn, ctx, runs):
+    fn(ctx)  # warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(ctx)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def heap_peak(fn, ctx):
+    tracemalloc.start()
+    fn(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak // 1024
+
+def rss_growth(case_name, stage):
+    """Run one stage in a child process and return its max RSS growth in KB."""
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", case_name, stage],
+        capture_output=True, text=True, check=True,
+    )
+    return int(out.stdout.strip().splitlines()[-1])
+
+def _proc_status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise OSError(f"{field} not in /proc/self/status")
+
+def _reset_peak_rss():
+    """Restart the kernel's peak RSS (VmHWM) from the current RSS; Linux only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def child(case_name, stage):
+    case = load_cases()[case_name]
+    ctx = setup(case)
+    fn = stages_for(case, ctx)[stage]
+    gc.collect()
+    if _reset_peak_rss():
+        before = _proc_status_kb("VmRSS")
+        fn(ctx)
+        print(_proc_status_kb("VmHWM") - before)
+    else:
+        # Without a resettable peak only growth beyond the setup's own peak shows
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        fn(ctx)
+        print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)
+
+# ----------------- Baseline -----------------
+def load_baseline():
+    try:
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            return json.load(f)["results"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def save_baseline(results):
+    os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+    with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+        json.dump({"machine": f"{platform.platform()} / Python {platform.python_version()}",
+                   "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def regressions(current, baseline, tolerance):
+    """Metric names of `current` that are worse than `baseline` beyond tolerance and noise."""
+    worse = []
+    for metric, noise in (("median_ms", NOISE_MS), ("heap_kb", NOISE_KB), ("rss_kb", NOISE_KB)):
+        now, before = current.get(metric), baseline.get(metric)
+        if now is None or before is None:
+            continue
+        if now - before > noise and now > before * (1 + tolerance):
+            worse.append(metric)
+    return worse
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-rss", action="store_true", help="skip the per-stage child processes")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth vs the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "STAGE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    npg.download_image = load_fixture_image
+    if args.child:
+        child(*args.child)
+        return
+
+    baseline = load_baseline()
+    results, flagged = {}, []
+    print(f"{'case':<28} {'stage':<10} {'median ms':>10} {'base ms':>9} {'heap KB':>9} {'RSS +KB':>9}")
+    for case_name, case in load_cases().items():
+        ctx = setup(case)
+        for stage, fn in stages_for(case, ctx).items():
+            key = f"{case_name}/{stage}"
+            result = {"median_ms": round(time_stage(fn, ctx, args.runs), 2), "heap_kb": heap_peak(fn, ctx)}
+            if not args.no_rss:
+                result["rss_kb"] = rss_growth(case_name, stage)
+            results[key] = result
+            base = baseline.get(key, {})
+            worse = regressions(result, base, args.tolerance)
+            if worse:
+                flagged.append(f"{key}: {', '.join(worse)}")
+            base_ms = f"{base['median_ms']:.2f}" if "median_ms" in base else "-"
+            print(f"{case_name:<28} {stage:<10} {result['median_ms']:>10.2f} {base_ms:>9} "
+                  f"{result['heap_kb']:>9} {result.get('rss_kb', '-'):>9}{'  REGRESSION' if worse else ''}")
+
+    if args.save_baseline:
+        save_baseline(results)
+        print(f"baseline written to {os.path.relpath(BASELINE_PATH, ROOT)}")
+    elif flagged:
+        print(f"regressions over {args.tolerance:.0%} of the baseline:")
+        for line in flagged:
+            print(f"  {line}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Calibration check for the near-duplicate story clustering.
+
+    python benchmarks/check_dedup.py [--threshold 0.45] [--min-recall 0.8]
+
+fixtures/dedup_pairs.json holds pairs of NewsAPI-style stories (title and
+description), marked as the same event from two outlets or as different
+events that share names and wording; some have no description, as
+NewsAPI often returns. All the stories are scored together, as one feed
+would be, and every pair is printed with its similarity and the
+threshold it has to reach (higher when either story is short).
+
+A different-event pair at or above the threshold would be merged and one
+of the stories silently dropped, so any such pair fails the check. A missed
+duplicate only costs selector tokens, so duplicates have to reach
+--min-recall. Exits 1 when either fails.
+"""
+import os
+import sys
+import json
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import NEWS_DEDUP_THRESHOLD  # noqa: E402
+from utils.news_dedup import similarity_matrix, merge_thresholds  # noqa: E402
+
+PAIRS_PATH = os.path.join(ROOT, "benchmarks", "fixtures", "dedup_pairs.json")
+
+def load_pairs():
+    with open(PAIRS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def score_pairs(pairs, threshold):
+    """
+    Similarity and merge threshold of each pair, with all distinct stories of
+    the fixture as the corpus.
+    """
+    stories = {}
+    for pair in pairs:
+        for story in (pair["a"], pair["b"]):
+            stories.setdefault(story["title"], story)
+    position = {title: i for i, title in enumerate(stories)}
+    similarity = similarity_matrix(list(stories.values()))
+    thresholds = merge_thresholds(list(stories.values()), threshold)
+    cells = [(position[p["a"]["title"]], position[p["b"]["title"]]) for p in pairs]
+    return [float(similarity[cell]) for cell in cells], [float(thresholds[cell]) for cell in cells]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=NEWS_DEDUP_THRESHOLD)
+    parser.add_argument("--min-recall", type=float, default=0.8, help="share of duplicate pairs that must merge")
+    args = parser.parse_args()
+
+    pairs = load_pairs()
+    scores, thresholds = score_pairs(pairs, args.threshold)
+    print(f"{'score':>6} {'needs':>6}  {'expected':<9} {'result':<7} pair")
+    wrong_merges, merged_duplicates = 0, 0
+    for pair, score, needs in sorted(zip(pairs, scores, thresholds), key=lambda pst: pst[1] - pst[2], reverse=True):
+        merged = score >= needs
+        if merged and not pair["duplicate"]:
+            wrong_merges += 1
+            result = "FAIL"
+        elif pair["duplicate"] and not merged:
+            result = "missed"
+        else:
+            merged_duplicates += merged
+            result = "ok"
+        print(f"{score:>6.3f} {needs:>6.2f}  {'same' if pair['duplicate'] else 'distinct':<9} {result:<7} {pair['note']}")
+
+    # Margins are score minus the pair's threshold, so short and full pairs compare
+    margins = [s - t for s, t in zip(scores, thresholds)]
+    duplicates = [m for p, m in zip(pairs, margins) if p["duplicate"]]
+    distinct = [m for p, m in zip(pairs, margins) if not p["duplicate"]]
+    recall = merged_duplicates / len(duplicates) if duplicates else 1.0
+    print(f"threshold {args.threshold:.3f}: lowest duplicate margin {min(duplicates, default=0):+.3f}, "
+          f"highest distinct margin {max(distinct, default=0):+.3f}, {wrong_merges} wrong merges, "
+          f"recall {merged_duplicates}/{len(duplicates)} ({recall:.0%})")
+    if wrong_merges or recall < args.min_recall:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Golden image check for the news post renderer.
+
+    python benchmarks/check_golden.py [--update] [--max-diff 32] [--mean-diff 0.25]
+
+Renders every post in fixtures/posts.json offline (images come from
+fixtures/images, no network) and compares it with fixtures/golden/<name>.png.
+Rendering changes that are meant to look the same, like the shadow
+compositing, may move anti-aliased and blurred pixels a little, so a post
+passes while its mean channel difference stays under --mean-diff, no single
+channel is off by more than --max-diff and at most --changed-share of the
+pixels differ by more than 16 levels. Exits 1 when any post fails.
+--update rewrites the golden images from the current renderer.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # font and logo paths are relative to the repo root
+
+from PIL import Image, ImageChops  # noqa: E402
+import news_post_generator as npg  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+IMAGES_DIR = os.path.join(FIXTURES_DIR, "images")
+GOLDEN_DIR = os.path.join(FIXTURES_DIR, "golden")
+CHANGED_LEVEL = 16
+
+def load_posts():
+    with open(os.path.join(FIXTURES_DIR, "posts.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def load_fixture_image(name, target_size=None):
+    """Stand-in for download_image: `urlToImage` names a file in fixtures/images."""
+    if not name:
+        return None
+    with open(os.path.join(IMAGES_DIR, name), "rb") as f:
+        return npg.decode_image(f.read(), target_size)
+
+def render(post, index):
+    """Render one fixture post and return it as an RGB image."""
+    data = npg.create_instagram_post(index, post["news_item"], post["analysis"], to_disk=False)
+    with Image.open(BytesIO(data)) as img:
+        return img.convert("RGB")
+
+def compare(expected, actual):
+    """Max and mean channel difference and the share of pixels off by more than CHANGED_LEVEL."""
+    diff = ImageChops.difference(expected, actual)
+    max_diff = max(hi for _, hi in diff.getextrema())
+    hist = diff.histogram()
+    total = expected.width * expected.height * 3
+    mean_diff = sum(level * count for channel in range(3)
+                    for level, count in enumerate(hist[channel * 256:(channel + 1) * 256])) / total
+    changed = ImageChops.lighter(ImageChops.lighter(*diff.split()[:2]), diff.split()[2])
+    changed_share = sum(changed.histogram()[CHANGED_LEVEL + 1:]) / (expected.width * expected.height)
+    return max_diff, mean_diff, changed_share
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="rewrite the golden images")
+    parser.add_argument("--max-diff", type=int, default=32)
+    parser.add_argument("--mean-diff", type=float, default=0.25)
+    parser.add_argument("--changed-share", type=float, default=0.002)
+    args = parser.parse_args()
+
+    npg.download_image = load_fixture_image
+    npg.preload_news_fonts()
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+
+    failed = False
+    print(f"{'post':<30} {'ms':>8} {'max':>5} {'mean':>7} {'changed':>8}")
+    for index, post in enumerate(load_posts()):
+        start = time.perf_counter()
+        actual = render(post, index)
+        elapsed = (time.perf_counter() - start) * 1000
+        golden_path = os.path.join(GOLDEN_DIR, f"{post['name']}.png")
+        if args.update:
+            actual.save(golden_path, optimize=True)
+            print(f"{post['name']:<30} {elapsed:>8.1f}  written")
+            continue
+        with Image.open(golden_path) as golden:
+            max_diff, mean_diff, changed_share = compare(golden.convert("RGB"), actual)
+        ok = (max_diff <= args.max_diff and mean_diff <= args.mean_diff
+              and changed_share <= args.changed_share)
+        failed |= not ok
+        print(f"{post['name']:<30} {elapsed:>8.1f} {max_diff:>5} {mean_diff:>7.3f} "
+              f"{changed_share:>7.2%}  {'ok' if ok else 'FAIL'}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
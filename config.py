@@ -12,4 +12,92 @@ TRADIENT_NEWS_URL = "https://api.tradient.org/v1/api/market/news"
 
 CHARTINK_SCAN_URL = "https://chartink.com/screener/process"
 
-INSTRUMENT_LIST_URL = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
\ No newline at end of file
+INSTRUMENT_LIST_URL = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
+
+# Article body fetching (utils/news_fetcher.py)
+ARTICLE_FETCH_TIMEOUT = 10          # seconds per article request
+ARTICLE_FETCH_MAX_WORKERS = 16      # total concurrent article downloads
+ARTICLE_FETCH_PER_HOST_LIMIT = 2    # concurrent downloads per publisher host
+ARTICLE_FETCH_DEADLINE = 60         # seconds for the whole batch of articles
+ARTICLE_MAX_BYTES = 2 * 1024 * 1024 # stop reading an article page after this many bytes
+ARTICLE_EXTRACTOR = "lxml"          # "lxml" (boilerplate scoring) or "bs4" (every <p>)
+
+# Shared HTTP client (utils/http_client.py)
+HTTP_CONNECT_TIMEOUT = 5            # seconds to establish a connection
+HTTP_READ_TIMEOUT = 10              # seconds to wait for response data
+HTTP_POOL_HOSTS = 32                # keep-alive pools kept (one per host)
+HTTP_PER_HOST_LIMIT = 4             # max open connections per host, extra calls wait
+HTTP_RETRIES = 3                    # retries on connection errors, 429 and 5xx
+HTTP_BACKOFF_FACTOR = 0.5           # base of the exponential backoff, in seconds
+
+# On-disk HTTP response cache (utils/http_cache.py)
+HTTP_CACHE_DIR = ".cache/http"
+HTTP_CACHE_TTL = 6 * 60 * 60                # seconds before a cached page is revalidated
+HTTP_CACHE_MAX_BYTES = 200 * 1024 * 1024    # LRU eviction above this many body bytes
+HTTP_CACHE_EVICT_TO = 0.9                   # share of HTTP_CACHE_MAX_BYTES an eviction frees the cache down to
+
+# News post pipeline (news_post_generator.py)
+MAX_NEWS_POSTS = 5                  # posts published per run
+PIPELINE_QUEUE_SIZE = 2             # items buffered between analyze -> render -> publish
+RENDER_WORKERS = 2                  # posts rendered in parallel
+NEWS_ANALYSIS_BATCH = True          # analyze all stories in one LLM request, per-story calls only as fallback
+NEWS_ANALYSIS_STREAM = False        # without batching: stream each analysis and lay out the heading early
+
+# Async OpenAI calls (llm_api/openaiAPI.py)
+LLM_MAX_CONCURRENCY = 4             # requests in flight at once
+LLM_REQUESTS_PER_MINUTE = 60
+LLM_TOKENS_PER_MINUTE = 200000
+LLM_COMPLETION_TOKENS_ESTIMATE = 1500   # reserved per request until the real usage is known
+LLM_MAX_RETRIES = 5                 # retries on 429 responses
+LLM_BACKOFF_SECONDS = 2.0           # base of the exponential backoff between retries
+
+# Persistent LLM response cache (llm_api/llm_cache.py)
+LLM_CACHE_PATH = ".cache/llm_cache.sqlite3"
+LLM_CACHE_TTL = 3 * 24 * 60 * 60    # seconds a cached answer stays valid
+LLM_CACHE_MAX_ENTRIES = 5000        # least recently used answers are dropped above this
+
+# LLM payload shaping (llm_api/payload.py)
+LLM_TEXT_TOKEN_BUDGET = 1500        # article bodies are cut to this many tokens before LLM calls
+
+# Font registry (utils/font_registry.py)
+FONT_CACHE_SIZE = 128               # (path, size) font objects kept per process
+
+# Batch rendering (batch_render.py)
+RENDER_PROCESSES = 0                # worker processes for batch renders, 0 = one per CPU core
+
+# Rendered post output (utils/image_output.py)
+POST_IMAGE_FORMAT = "PNG"           # PNG, JPEG or WEBP
+POST_PNG_COMPRESS_LEVEL = 3         # zlib level 0-9; 3 encodes about 2x faster than 6 for ~20% more bytes
+POST_IMAGE_QUALITY = 90             # JPEG / WebP quality
+POST_SAVE_TO_DISK = False           # also write each post under posts/; uploads use the in-memory bytes
+
+# Article images (news_post_generator.download_image)
+IMAGE_MAX_BYTES = 8 * 1024 * 1024   # larger downloads are rejected, not truncated
+IMAGE_MAX_PIXELS = 40_000_000       # images above this are rejected before decoding
+IMAGE_FORMATS = ("JPEG", "PNG", "WEBP", "GIF")
+
+# Run profiling (utils/profiling.py); PROFILE_CPROFILE=<file> and PROFILE_TRACEMALLOC=1 switch on the profilers
+PROFILE_REPORT_PATH = "reports/timing_report.json"   # per-run JSON report of stage timings and counters
+
+# Near-duplicate story clustering (utils/news_dedup.py)
+NEWS_DEDUP_THRESHOLD = 0.45         # word TF-IDF cosine of title+description to merge; benchmarks/check_dedup.py
+NEWS_DEDUP_SHORT_TERMS = 12         # stories with fewer words, or no description, count as short
+NEWS_DEDUP_SHORT_THRESHOLD = 0.9    # share of the shorter story's words and word pairs the other must contain
+
+# Local pre-ranking of stories before the selector (utils/news_ranker.py)
+NEWS_RANK_TOP_K = 40                # stories sent to the selector prompt; 0 sends all of them
+NEWS_RANK_HALF_LIFE_HOURS = 12      # age at which the recency feature halves
+NEWS_RANK_WEIGHTS = {               # weights of the 0..1 features in the score
+    "popularity": 0.35,             # NewsAPI popularity order
+    "coverage": 0.25,               # outlets that ran the same story
+    "source": 0.10,                 # size of the outlet in the feed
+    "recency": 0.15,
+    "centrality": 0.15,             # TF-IDF similarity with the whole feed
+}
+
+# Incremental Tradient stock news polling (utils/news_fetcher.StockNewsPoller)
+TRADIENT_POLL_STATE_PATH = ".cache/tradient_poll.json"   # high-water mark and recently seen ids
+TRADIENT_POLL_LOOKBACK = 30 * 60    # seconds below the high-water mark still accepted, for late arrivals
+
+# Symbol index built daily from NSE_EQUITY_LIST_URL and INSTRUMENT_LIST_URL (utils/symbol_index.py)
+SYMBOL_INDEX_PATH = ".cache/symbol_index.pkl"
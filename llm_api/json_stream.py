@@ -0,0 +1,134 @@
+import json
+
+WHITESPACE = " \t\r\n"
+FENCE_CHARS = "`jsonJSON" + WHITESPACE  # a leading ```json fence is tolerated
+
+class IncrementalJSONParser:
+    """
+    Parse a JSON object as it streams in, one chunk at a time.
+    feed() returns the events completed by that chunk:
+      ("item", key, value)   one finished element of a top-level array
+      ("field", key, value)  a finished top-level value
+      ("done", None, obj)    the closing brace of the object
+    Output that cannot be the expected object raises ValueError as soon as
+    that is evident, so the caller can stop paying for the rest of it.
+    """
+
+    def __init__(self):
+        self.result = {}
+        self._state = "preamble"
+        self._key_chars = []
+        self._key = None
+        self._value = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start = None
+
+    @property
+    def done(self):
+        return self._state == "done"
+
+    def feed(self, chunk):
+        events = []
+        for ch in chunk:
+            self._step(ch, events)
+            if self._state == "done":
+                break
+        return events
+
+    def _fail(self, ch):
+        raise ValueError(f"unexpected {ch!r} in LLM JSON stream (state {self._state})")
+
+    def _step(self, ch, events):
+        state = self._state
+        if state == "preamble":
+            if ch == "{":
+                self._state = "key_or_end"
+            elif ch not in FENCE_CHARS:
+                self._fail(ch)
+        elif state in ("key_or_end", "key"):
+            if ch == '"':
+                self._key_chars = []
+                self._state = "key_string"
+            elif ch == "}" and state == "key_or_end":
+                self._finish_object(events)
+            elif ch not in WHITESPACE:
+                self._fail(ch)
+        elif state == "key_string":
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._key = json.loads('"' + "".join(self._key_chars) + '"')
+                self._state = "colon"
+                return
+            self._key_chars.append(ch)
+        elif state == "colon":
+            if ch == ":":
+                self._state = "value_start"
+            elif ch not in WHITESPACE:
+                self._fail(ch)
+        elif state == "value_start":
+            if ch in WHITESPACE:
+                return
+            if ch in ",}]:":
+                self._fail(ch)
+            self._value = []
+            self._depth = 0
+            self._item_start = 1 if ch == "[" else None
+            self._state = "value"
+            self._step_value(ch, events)
+        elif state == "value":
+            self._step_value(ch, events)
+
+    def _step_value(self, ch, events):
+        if self._in_string:
+            self._value.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+            return
+
+        if self._depth == 0 and ch in ",}":
+            # End of this top-level value
+            self._finish_value(events)
+            if ch == ",":
+                self._state = "key"
+            else:
+                self._finish_object(events)
+            return
+
+        self._value.append(ch)
+        if ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth < 0:
+                self._fail(ch)
+            if self._item_start is not None and self._depth == 0:
+                self._finish_item(len(self._value) - 1, events)
+                self._item_start = None
+        elif ch == "," and self._depth == 1 and self._item_start is not None:
+            self._finish_item(len(self._value) - 1, events)
+            self._item_start = len(self._value)
+
+    def _finish_item(self, end, events):
+        text = "".join(self._value[self._item_start:end]).strip()
+        if text:
+            events.append(("item", self._key, json.loads(text)))
+
+    def _finish_value(self, events):
+        value = json.loads("".join(self._value))
+        self.result[self._key] = value
+        events.append(("field", self._key, value))
+
+    def _finish_object(self, events):
+        self._state = "done"
+        events.append(("done", None, self.result))
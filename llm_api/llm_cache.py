@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from config import LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", LLM_CACHE_PATH)
+CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "") not in ("", "0")
+
+_conn = None
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+def _connection():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(CACHE_PATH) or ".", exist_ok=True)
+        _conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, result TEXT,"
+            " created_at REAL, last_access REAL)"
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        _conn.commit()
+    return _conn
+
+def cache_key(model, prompt, data):
+    """Hash of model, prompt template and a canonical JSON dump of data."""
+    canonical = json.dumps(
+        {"model": model, "prompt": prompt, "data": data},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def get(model, prompt, data, ttl=LLM_CACHE_TTL):
+    """Return the cached parsed JSON for this call, or None."""
+    if CACHE_BYPASS:
+        return None
+    key = cache_key(model, prompt, data)
+    now = time.time()
+    with _lock:
+        row = _connection().execute(
+            "SELECT result FROM responses WHERE key = ? AND created_at > ?", (key, now - ttl)
+        ).fetchone()
+        if row is None:
+            _stats["misses"] += 1
+            return None
+        _connection().execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        _connection().commit()
+        _stats["hits"] += 1
+    return json.loads(row[0])
+
+def put(model, prompt, data, result, max_entries=LLM_CACHE_MAX_ENTRIES):
+    """Store a successfully parsed result, then drop expired rows and trim to max_entries."""
+    if CACHE_BYPASS:
+        return
+    key = cache_key(model, prompt, data)
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, model, result, created_at, last_access)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, model, json.dumps(result), now, now),
+        )
+        evicted = conn.execute(
+            "DELETE FROM responses WHERE created_at <= ?", (now - LLM_CACHE_TTL,)
+        ).rowcount
+        evicted += conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (max_entries,),
+        ).rowcount
+        conn.commit()
+        _stats["stores"] += 1
+        _stats["evictions"] += evicted
+
+def cache_stats():
+    """Return a copy of the hit/miss counters with the hit rate."""
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
@@ -1,20 +1,49 @@
 import os
 import json
+import random
+import asyncio
 import openai
-from config import MODEL_ID
+from contextlib import asynccontextmanager
+from openai import AsyncOpenAI
+from config import (MODEL_ID, LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE,
+                    LLM_COMPLETION_TOKENS_ESTIMATE, LLM_MAX_RETRIES, LLM_BACKOFF_SECONDS,
+                    LLM_TEXT_TOKEN_BUDGET)
+from llm_api.rate_limiter import RateLimiter
+from llm_api import llm_cache, payload
+from llm_api.json_stream import IncrementalJSONParser
+from utils import profiling
 
 openai.api_key = os.getenv("OPENAI_API_KEY")
 MODEL = os.getenv("MODEL_ID", MODEL_ID)
 
-def call_llm(prompt, data):
-    """Call the LLM with a structured prompt and return parsed JSON dict."""
-    prompt = f"{prompt}\n\nData:\n{json.dumps(data, indent=1)}"
+_async_client = None
+_limiter = RateLimiter(LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
+
+@profiling.timer("llm.call")
+def call_llm(prompt, data, use_cache=True, fields=None, max_text_tokens=LLM_TEXT_TOKEN_BUDGET):
+    """Call the LLM with a structured prompt and return parsed JSON dict.
+    Only `fields` of data are sent (all when None), long article text is cut
+    to max_text_tokens. Parsed answers are cached on disk; use_cache=False
+    forces a fresh call."""
+    model = os.getenv("MODEL_ID", MODEL_ID)
+    shaped = payload.shape_payload(data, fields, max_text_tokens)
+    if use_cache:
+        cached = llm_cache.get(model, prompt, shaped)
+        if cached is not None:
+            return cached
+    full_prompt = payload.build_prompt(prompt, shaped, original=data)
     resp = openai.chat.completions.create(
-        model=os.getenv("MODEL_ID", MODEL_ID),
-        messages=[{"role": "user", "content": prompt}],
+        model=model,
+        messages=[{"role": "user", "content": full_prompt}],
     )
     content = resp.choices[0].message.content or ""
+    result = parse_json_content(content)
+    if use_cache:
+        llm_cache.put(model, prompt, shaped, result)
+    return result
 
+def parse_json_content(content):
+    """Parse the JSON payload of an LLM reply, tolerating code fences and extra text."""
     # Strip accidental code fences if any
     cleaned = content.replace("```json", "").replace("```", "").strip()
 
@@ -22,14 +51,15 @@ def call_llm(prompt, data):
     try:
         return json.loads(cleaned)
     except json.JSONDecodeError as e:
-        # Fall back: try to extract JSON substring if model added extra text
-        start = cleaned.find("{")
-        end = cleaned.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            try:
-                return json.loads(cleaned[start:end+1])
-            except Exception:
-                pass
+        # Fall back: try to extract a JSON object or array if model added extra text
+        for opener, closer in (("{", "}"), ("[", "]")):
+            start = cleaned.find(opener)
+            end = cleaned.rfind(closer)
+            if start != -1 and end != -1 and end > start:
+                try:
+                    return json.loads(cleaned[start:end+1])
+                except Exception:
+                    pass
         raise RuntimeError(f"LLM did not return valid JSON: {e}\nRaw:\n{content}")
     
 def call_llm_text_output(prompt):
@@ -59,4 +89,220 @@ def call_llm_with_web_tool(PROMPT,news_item):
     content = resp.choices[0].message.get("content", "")
     return content
 
-    
\ No newline at end of file
+# ----------------- Async variants -----------------
+def get_async_client():
+    """Shared AsyncOpenAI client; retries are handled by _acreate so the SDK's are off."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return _async_client
+
+def _estimate_tokens(messages):
+    # ~4 characters per token is close enough for budgeting
+    prompt_chars = sum(len(m["content"]) for m in messages)
+    return prompt_chars // 4 + LLM_COMPLETION_TOKENS_ESTIMATE
+
+def _retry_delay(error, attempt):
+    retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        backoff = LLM_BACKOFF_SECONDS * 2 ** attempt
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+def _record_usage(reservation, usage):
+    _limiter.settle(reservation, usage.total_tokens if usage else None)
+    if usage:
+        profiling.count("llm.prompt_tokens", usage.prompt_tokens)
+        profiling.count("llm.completion_tokens", usage.completion_tokens)
+
+async def _acreate(**kwargs):
+    """chat.completions.create through the concurrency cap, the RPM/TPM budget and 429 retries."""
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        async with _limiter.slot(_estimate_tokens(kwargs["messages"])) as reservation:
+            try:
+                with profiling.timer("llm.request"):
+                    resp = await get_async_client().chat.completions.create(**kwargs)
+            except openai.RateLimitError as e:
+                profiling.count("llm.rate_limited")
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(e, attempt)
+            else:
+                _record_usage(reservation, getattr(resp, "usage", None))
+                return resp
+        print(f"WARNING: LLM rate limited, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+@asynccontextmanager
+async def _astream(**kwargs):
+    """
+    _acreate for streamed replies: yields the chunks as an async iterator. The
+    concurrency slot stays taken until the stream has been read or the block
+    is left, and the token reservation is settled with the usage the stream
+    reports in its last chunk (kept at the estimate when it is cut off earlier).
+    """
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        async with _limiter.slot(_estimate_tokens(kwargs["messages"])) as reservation:
+            try:
+                # Time to the first chunk
+                with profiling.timer("llm.request"):
+                    stream = await get_async_client().chat.completions.create(
+                        **kwargs, stream=True, stream_options={"include_usage": True})
+            except openai.RateLimitError as e:
+                profiling.count("llm.rate_limited")
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(e, attempt)
+            else:
+                usage = []
+
+                async def chunks():
+                    async for chunk in stream:
+                        if getattr(chunk, "usage", None):
+                            usage.append(chunk.usage)
+                        yield chunk
+
+                reader = chunks()
+                try:
+                    yield reader
+                finally:
+                    await reader.aclose()
+                    await stream.close()
+                    _record_usage(reservation, usage[-1] if usage else None)
+                return
+        print(f"WARNING: LLM rate limited, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+async def call_llm_async(prompt, data, use_cache=True, fields=None, max_text_tokens=LLM_TEXT_TOKEN_BUDGET):
+    """Async call_llm: structured prompt in, parsed JSON dict out, same shaping and disk cache."""
+    with profiling.timer("llm.call_async"):
+        model = os.getenv("MODEL_ID", MODEL_ID)
+        shaped = payload.shape_payload(data, fields, max_text_tokens)
+        if use_cache:
+            cached = llm_cache.get(model, prompt, shaped)
+            if cached is not None:
+                return cached
+        full_prompt = payload.build_prompt(prompt, shaped, original=data)
+        resp = await _acreate(
+            model=model,
+            messages=[{"role": "user", "content": full_prompt}],
+        )
+        content = resp.choices[0].message.content or ""
+        result = parse_json_content(content)
+        if use_cache:
+            llm_cache.put(model, prompt, shaped, result)
+        return result
+
+def _replay_events(result):
+    """The events IncrementalJSONParser would have produced for a finished object."""
+    for key, value in result.items():
+        if isinstance(value, list):
+            for item in value:
+                yield "item", key, item
+        yield "field", key, value
+    yield "done", None, result
+
+async def stream_llm_json_async(prompt, data, use_cache=True, fields=None, max_text_tokens=LLM_TEXT_TOKEN_BUDGET):
+    """
+    Streaming call_llm_async: yields (event, key, value) tuples from
+    IncrementalJSONParser while the reply is still being generated, e.g.
+    ("field", "heading", ...) long before the pointers are finished, and
+    ("done", None, result) at the end. A reply that is not a JSON object is
+    cut off as soon as that shows and raises RuntimeError.
+    """
+    model = os.getenv("MODEL_ID", MODEL_ID)
+    shaped = payload.shape_payload(data, fields, max_text_tokens)
+    if use_cache:
+        cached = llm_cache.get(model, prompt, shaped)
+        if cached is not None:
+            for event in _replay_events(cached):
+                yield event
+            return
+
+    full_prompt = payload.build_prompt(prompt, shaped, original=data)
+    parser = IncrementalJSONParser()
+    received = []
+    async with _astream(model=model, messages=[{"role": "user", "content": full_prompt}]) as stream:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content or ""
+            received.append(text)
+            try:
+                events = parser.feed(text)
+            except ValueError as e:
+                raise RuntimeError(f"LLM stream is not valid JSON, aborted: {e}\nRaw:\n{''.join(received)}")
+            for event in events:
+                yield event
+            if parser.done:
+                break
+
+    if not parser.done:
+        raise RuntimeError(f"LLM stream ended before the JSON object was complete\nRaw:\n{''.join(received)}")
+    if use_cache:
+        llm_cache.put(model, prompt, shaped, parser.result)
+
+async def call_llm_batch_async(prompt, items, validate, fallback_prompt, use_cache=True, fields=None):
+    """
+    Send all items in one request and return one result per item, in order.
+    Every item goes out with an "id" and the reply must be a JSON array of
+    objects carrying those ids. Entries that are missing or fail
+    validate(entry) are redone one item at a time with fallback_prompt;
+    items that fail both ways come back as None. `fields` limits what is
+    sent of each item, as in call_llm.
+    """
+    batch = [{**item, "id": str(i)} for i, item in enumerate(items)]
+    batch_fields = tuple(fields) + ("id",) if fields is not None else None
+    results = [None] * len(items)
+    try:
+        reply = await call_llm_async(prompt, batch, use_cache=use_cache, fields=batch_fields)
+    except Exception as e:
+        print(f"WARNING: batched LLM call failed, falling back to one call per item: {e}")
+        reply = []
+    if isinstance(reply, dict):
+        # Tolerate the array being wrapped, e.g. {"results": [...]}
+        reply = next((v for v in reply.values() if isinstance(v, list)), [])
+
+    for entry in reply if isinstance(reply, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        entry_id = str(entry.pop("id", ""))
+        if entry_id.isdigit() and int(entry_id) < len(items) and results[int(entry_id)] is None:
+            if validate(entry):
+                results[int(entry_id)] = entry
+
+    async def fallback(i):
+        try:
+            result = await call_llm_async(fallback_prompt, items[i], use_cache=use_cache, fields=fields)
+        except Exception as e:
+            print(f"ERROR : fallback LLM call failed for item {i}: {e}")
+            return
+        if validate(result):
+            results[i] = result
+        else:
+            print(f"ERROR : fallback LLM call returned an invalid result for item {i}")
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        print(f"INFO: {len(missing)} of {len(items)} batched results missing or invalid, retrying one by one")
+        await asyncio.gather(*(fallback(i) for i in missing))
+    return results
+
+async def call_llm_text_output_async(prompt):
+    resp = await _acreate(
+        model=os.getenv("MODEL_ID", MODEL_ID),
+        messages=[{"role": "user", "content": prompt}],
+    )
+    return resp.choices[0].message.content or ""
+
+async def call_llm_with_web_tool_async(PROMPT, news_item):
+    resp = await _acreate(
+        model=os.getenv("MODEL_ID", "gpt-5"),   # fallback to gpt-5
+        messages=[
+            {"role": "system", "content": PROMPT},
+            {"role": "user", "content": json.dumps(news_item)},
+        ],
+        tools=[{"type": "browse_web"}],  # enable browsing tool
+    )
+    return resp.choices[0].message.content or ""
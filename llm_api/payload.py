@@ -0,0 +1,73 @@
+import json
+import threading
+from config import LLM_TEXT_TOKEN_BUDGET
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # optional: fall back to the ~4 characters per token estimate
+    _encoding = None
+
+TEXT_FIELDS = ("article_text",)
+
+_lock = threading.Lock()
+_stats = {"calls": 0, "tokens_before": 0, "tokens_after": 0}
+
+def count_tokens(text):
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+def truncate_tokens(text, max_tokens):
+    """Cut text to at most max_tokens, on a word boundary when estimating."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text)[:max_tokens]) + " …"
+    cut = text[:max_tokens * 4]
+    return cut[:cut.rfind(" ")] + " …" if " " in cut else cut
+
+def _shape_item(item, fields, max_text_tokens):
+    if not isinstance(item, dict):
+        return item
+    shaped = {k: v for k, v in item.items() if fields is None or k in fields}
+    for key in TEXT_FIELDS:
+        if isinstance(shaped.get(key), str) and max_text_tokens:
+            shaped[key] = truncate_tokens(shaped[key], max_text_tokens)
+    return shaped
+
+def shape_payload(data, fields=None, max_text_tokens=LLM_TEXT_TOKEN_BUDGET):
+    """
+    Keep only `fields` of a dict (or of each dict in a list) and cut long
+    text fields such as article_text to `max_text_tokens`.
+    """
+    if isinstance(data, list):
+        return [_shape_item(item, fields, max_text_tokens) for item in data]
+    return _shape_item(data, fields, max_text_tokens)
+
+def serialize_payload(data):
+    """Compact JSON: no indentation or spaces after separators, raw unicode."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def build_prompt(prompt, shaped, original=None):
+    """
+    Append shaped data to the prompt as compact JSON. When `original` is
+    given, log and total the tokens saved against the old indent=1 dump of it.
+    """
+    full_prompt = f"{prompt}\n\nData:\n{serialize_payload(shaped)}"
+    if original is not None:
+        before = count_tokens(f"{prompt}\n\nData:\n{json.dumps(original, indent=1)}")
+        after = count_tokens(full_prompt)
+        with _lock:
+            _stats["calls"] += 1
+            _stats["tokens_before"] += before
+            _stats["tokens_after"] += after
+        print(f"INFO: LLM payload {after} tokens, {before - after} saved by shaping")
+    return full_prompt
+
+def payload_stats():
+    """Totals over every shaped call: tokens before, after and saved."""
+    with _lock:
+        stats = dict(_stats)
+    stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+    return stats
@@ -0,0 +1,50 @@
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+class RateLimiter:
+    """
+    Concurrency cap plus a sliding one-minute budget of requests and tokens.
+    Each request reserves an estimated token count up front; once the real
+    usage is known the reservation is corrected with `settle()`.
+    """
+
+    def __init__(self, max_concurrency, requests_per_minute, tokens_per_minute, window=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._entries = deque()  # [timestamp, tokens] per request in the window
+
+    def _expire(self, now):
+        while self._entries and now - self._entries[0][0] >= self.window:
+            self._entries.popleft()
+
+    async def _reserve(self, tokens):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                used = sum(entry[1] for entry in self._entries)
+                # An empty window always admits one request, even an oversized one
+                if not self._entries or (
+                    len(self._entries) < self.requests_per_minute
+                    and used + tokens <= self.tokens_per_minute
+                ):
+                    entry = [now, tokens]
+                    self._entries.append(entry)
+                    return entry
+                await asyncio.sleep(self._entries[0][0] + self.window - now)
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens):
+        """Wait for a free concurrency slot and enough budget, yield the reservation."""
+        async with self._semaphore:
+            yield await self._reserve(estimated_tokens)
+
+    def settle(self, reservation, actual_tokens):
+        """Replace the estimated token count of a reservation with the real usage."""
+        if actual_tokens:
+            reservation[1] = actual_tokens
@@ -2,43 +2,93 @@ import asyncio
 import telegram
 import os
 import sys
-import json
-import requests
+import itertools
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageChops
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw, ImageFilter, ImageChops
 import textwrap
 from notification.telegram_msg import send_image_to_telegram
-from utils.news_fetcher import fetch_newapi_articles
-from config import MODEL_ID
-from llm_api.openaiAPI import call_llm
-from prompts.news_analyzer_prompts import ANALYZE_NEWS_ARTICLE_PROMPT, VIRAL_NEWS_SELECTOR_PROMPT
+from utils import http_cache, profiling
+from utils.font_registry import get_font, preload_fonts, word_width
+from utils.text_shadow import ShadowLayer
+from utils.post_templates import get_template
+from utils.image_output import export_post
+from utils.news_fetcher import fetch_newapi_headlines, fetch_article_bodies, FETCH_OK
+from utils.news_dedup import dedupe_stories
+from utils.news_ranker import top_stories
+from config import (MODEL_ID, MAX_NEWS_POSTS, PIPELINE_QUEUE_SIZE, RENDER_WORKERS, NEWS_ANALYSIS_BATCH,
+                    NEWS_ANALYSIS_STREAM, IMAGE_MAX_BYTES, IMAGE_MAX_PIXELS, IMAGE_FORMATS)
+from llm_api.openaiAPI import call_llm_async, call_llm_batch_async, stream_llm_json_async
+from llm_api import llm_cache, payload
+from prompts.news_analyzer_prompts import (ANALYZE_NEWS_ARTICLE_PROMPT, ANALYZE_NEWS_ARTICLES_BATCH_PROMPT,
+                                           VIRAL_NEWS_SELECTOR_PROMPT)
 
 # ----------------- Helper: Download image -----------------
-def download_image(url):
+# Modes Image.reduce can average; palette, bilevel and 16-bit images are converted first
+REDUCE_MODES = ("L", "LA", "La", "RGB", "RGBA", "RGBa", "RGBX", "CMYK", "YCbCr", "LAB", "HSV", "I", "F")
+
+def decode_image(data, target_size=None):
+    """
+    Decode image bytes to RGB. Formats outside IMAGE_FORMATS and images over
+    IMAGE_MAX_PIXELS are rejected from the header alone. With `target_size`
+    (a box the image will be fitted into) big images are decoded near that
+    size: JPEGs through draft mode, other formats with Image.reduce.
+    """
+    img = Image.open(BytesIO(data), formats=IMAGE_FORMATS)
+    ow, oh = img.size
+    if ow * oh > IMAGE_MAX_PIXELS:
+        raise ValueError(f"image too large: {ow}x{oh}")
+    if target_size:
+        ratio = min(target_size[0] / ow, target_size[1] / oh)
+        if ratio < 1:
+            need_w, need_h = max(1, int(ow * ratio)), max(1, int(oh * ratio))
+            if img.format == "JPEG":
+                img.draft("RGB", (need_w, need_h))  # DCT scaling, never below the requested size
+            else:
+                factor = int(min(ow / need_w, oh / need_h))
+                if factor >= 2:
+                    if img.mode not in REDUCE_MODES:
+                        img = img.convert("RGB")
+                    img = img.reduce(factor)
+    return img.convert("RGB")
+
+def download_image(url, target_size=None):
+    """Download an article image with a byte cap and decode it (see decode_image), or None."""
     try:
         if url:
-            resp = requests.get(url, timeout=10)
+            resp = http_cache.cached_get(url, timeout=10, max_bytes=IMAGE_MAX_BYTES, truncate=False)
             if resp.status_code == 200:
-                return Image.open(BytesIO(resp.content)).convert("RGB")
+                return decode_image(resp.content, target_size)
     except Exception as e:
         print(f"Image download failed: {e}")
     return None
 
 # ----------------- Pixel wrapping helper -----------------
+WRAP_EXACT_MARGIN = 2  # px; closer than this to max_width the joined line is measured for real
+
 def wrap_text_by_pixels(draw, text, font, max_width):
-    """Wrap text based on pixel width (not characters)."""
+    """Wrap text based on pixel width (not characters).
+    Line widths are summed from cached word and space widths; only lines
+    within WRAP_EXACT_MARGIN of the limit are measured as a whole string."""
     words = text.split()
     if not words:
         return []
     
+    space_w = word_width(draw, font, " ")
     lines, cur = [], words[0]
+    cur_w = word_width(draw, font, cur)
     for w in words[1:]:
-        trial = f"{cur} {w}"
-        if draw.textlength(trial, font=font) <= max_width:
-            cur = trial
+        w_w = word_width(draw, font, w)
+        trial_w = cur_w + space_w + w_w
+        if abs(trial_w - max_width) <= WRAP_EXACT_MARGIN:
+            # Kerning across the join can tip the balance this close to the limit
+            trial_w = draw.textlength(f"{cur} {w}", font=font)
+        if trial_w <= max_width:
+            cur = f"{cur} {w}"
+            cur_w = trial_w
         else:
             lines.append(cur)
-            cur = w
+            cur, cur_w = w, w_w
     lines.append(cur)
     return lines
 
@@ -54,28 +104,40 @@ def multiline_height(draw, lines, font, line_spacing=12):
     return total
 
 # ----------------- Dynamic font sizing helper -----------------
+def largest_fitting_size(min_size, max_size, fits):
+    """Binary search for the largest size in [min_size, max_size] where fits(size)
+    holds, assuming bigger text never fits better. None if no size fits."""
+    best = None
+    lo, hi = min_size, max_size
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            best = mid
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return best
+
 def find_optimal_font_size(draw, text, font_path, max_width, max_height, min_size, max_size, 
                            max_lines=None, line_spacing=12):
     """Find the optimal font size that fits within constraints."""
-    best_size = min_size
-    best_lines = []
+    wrapped = {}
     
-    for size in range(max_size, min_size - 1, -1):
-        font = ImageFont.truetype(font_path, size)
-        lines = wrap_text_by_pixels(draw, text, font, max_width)
+    def fits(size):
+        font = get_font(font_path, size)
+        lines = wrapped[size] = wrap_text_by_pixels(draw, text, font, max_width)
         
         # Check line count constraint
         if max_lines and len(lines) > max_lines:
-            continue
+            return False
             
         # Check height constraint
-        height = multiline_height(draw, lines, font, line_spacing)
-        if height <= max_height:
-            best_size = size
-            best_lines = lines
-            break
+        return multiline_height(draw, lines, font, line_spacing) <= max_height
     
-    return best_size, best_lines
+    best_size = largest_fitting_size(min_size, max_size, fits)
+    if best_size is None:
+        return min_size, []
+    return best_size, wrapped[best_size]
 
 # ----------------- Bullet rendering helper -----------------
 def measure_bullets(draw, points, font, max_width, line_spacing=12, between_bullets=20, bullet="• "):
@@ -95,11 +157,32 @@ def measure_bullets(draw, points, font, max_width, line_spacing=12, between_bull
     
     return all_wrapped, total_h, bullet_width
 
+def find_bullet_font(draw, points, fonts_config, max_width, max_height, line_spacing=12, between_bullets=20):
+    """Largest bullet font whose wrapped bullets fit max_height, else the minimum size.
+    Returns (font, wrapped_points, total_height, bullet_width)."""
+    measured = {}
+    
+    def fits(size):
+        measured[size] = measure_bullets(
+            draw, points, get_font(fonts_config['bullet_path'], size), max_width,
+            line_spacing=line_spacing, between_bullets=between_bullets
+        )
+        return measured[size][1] <= max_height
+    
+    size = largest_fitting_size(fonts_config['bullet_min'], fonts_config['bullet_max'], fits)
+    if size is None:
+        size = fonts_config['bullet_min']
+    return (get_font(fonts_config['bullet_path'], size),) + measured[size]
+
+@profiling.timer("render.bullets")
 def draw_bullet_paragraph(final_img, draw, x, y, wrapped_points, font, fills, max_width, 
                          bullet="• ", line_spacing=12, between_bullets=25):
-    """Draw bullets with cloud-like shadow and proper spacing."""
+    """Draw bullets with cloud-like shadow and proper spacing.
+    All line shadows are blurred and composited in one pass before the text."""
     bullet_width = draw.textlength(bullet, font=font)
     cur_y = y
+    shadow = ShadowLayer(final_img.size, blur_radius=6, passes=4, offset=4)
+    text_lines = []  # (xy, text, color), drawn once the shadows are in place
     
     # Normalize fills to a list matching number of bullets
     if isinstance(fills, (list, tuple)):
@@ -119,23 +202,9 @@ def draw_bullet_paragraph(final_img, draw, x, y, wrapped_points, font, fills, ma
                 text_x = indent_x
                 full_line = line
             
-            # Cloud-like shadow layer
-            shadow_layer = Image.new("RGBA", final_img.size, (0, 0, 0, 0))
-            shadow_draw = ImageDraw.Draw(shadow_layer)
-            
-            for offset in range(4):
-                shadow_draw.text(
-                    (text_x + 4 + offset, cur_y + 4 + offset),
-                    full_line,
-                    font=font,
-                    fill=(0, 0, 0, 200)
-                )
-            
-            shadow_layer = shadow_layer.filter(ImageFilter.GaussianBlur(6))
-            final_img.alpha_composite(shadow_layer)
-            
-            # Actual text
-            draw.text((text_x, cur_y), full_line, font=font, fill=color)
+            # Cloud-like shadow, actual text
+            shadow.add_text((text_x, cur_y), full_line, font)
+            text_lines.append(((text_x, cur_y), full_line, color))
             
             bbox = draw.textbbox((0, 0), line, font=font)
             line_h = bbox[3] - bbox[1]
@@ -144,11 +213,14 @@ def draw_bullet_paragraph(final_img, draw, x, y, wrapped_points, font, fills, ma
         if bi < len(wrapped_points) - 1:
             cur_y += between_bullets
     
+    shadow.composite(final_img)
+    for xy, full_line, color in text_lines:
+        draw.text(xy, full_line, font=font, fill=color)
     return cur_y
 
 # ----------------- Calculate dynamic layout -----------------
-def calculate_dynamic_layout(draw, heading, pointers, fonts_config, dimensions):
-    """Calculate optimal layout with dynamic spacing and font sizes."""
+def calculate_heading_layout(draw, heading, fonts_config, dimensions):
+    """First half of the layout pass: fit the heading into its share of the content area."""
     IMG_W, IMG_H = dimensions['width'], dimensions['height']
     IMAGE_H = dimensions['image_height']
     WATERMARK_H = dimensions['watermark_height']
@@ -184,37 +256,50 @@ def calculate_dynamic_layout(draw, heading, pointers, fonts_config, dimensions):
         line_spacing=15
     )
     
-    heading_font = ImageFont.truetype(fonts_config['heading_path'], heading_font_size)
+    heading_font = get_font(fonts_config['heading_path'], heading_font_size)
     actual_heading_height = multiline_height(draw, heading_lines, heading_font, 15)
     
+    return {
+        'heading': heading,
+        'heading_font': heading_font,
+        'heading_lines': heading_lines,
+        'heading_height': actual_heading_height,
+        'content_start_y': content_start_y,
+        'available_height': available_height,
+        'left_pad': left_pad,
+        'max_text_width': max_text_width
+    }
+
+@profiling.timer("render.layout")
+def calculate_dynamic_layout(draw, heading, pointers, fonts_config, dimensions, heading_layout=None):
+    """Calculate optimal layout with dynamic spacing and font sizes.
+    A heading_layout computed earlier for the same heading is reused."""
+    if heading_layout is None or heading_layout['heading'] != heading:
+        heading_layout = calculate_heading_layout(draw, heading, fonts_config, dimensions)
+    heading_font = heading_layout['heading_font']
+    heading_lines = heading_layout['heading_lines']
+    actual_heading_height = heading_layout['heading_height']
+    content_start_y = heading_layout['content_start_y']
+    available_height = heading_layout['available_height']
+    left_pad = heading_layout['left_pad']
+    max_text_width = heading_layout['max_text_width']
+    
     # Space between heading and bullets
     heading_bullet_gap = max(25, int(available_height * 0.05))
     
     # Calculate remaining space for bullets
     remaining_height = available_height - actual_heading_height - heading_bullet_gap
     
-    # Find optimal bullet font size
-    bullet_font_size = fonts_config['bullet_max']
-    bullet_font = ImageFont.truetype(fonts_config['bullet_path'], bullet_font_size)
-    
     # Adjust bullet spacing based on available space
     line_spacing = 12
     between_bullets = max(20, min(35, int(remaining_height * 0.08)))
     
-    wrapped_bullets, bullets_height, bullet_width = measure_bullets(
-        draw, pointers, bullet_font, max_text_width, 
+    # Find optimal bullet font size
+    bullet_font, wrapped_bullets, bullets_height, bullet_width = find_bullet_font(
+        draw, pointers, fonts_config, max_text_width, remaining_height,
         line_spacing=line_spacing, between_bullets=between_bullets
     )
     
-    # Reduce font size if bullets don't fit
-    while bullets_height > remaining_height and bullet_font_size > fonts_config['bullet_min']:
-        bullet_font_size -= 1
-        bullet_font = ImageFont.truetype(fonts_config['bullet_path'], bullet_font_size)
-        wrapped_bullets, bullets_height, bullet_width = measure_bullets(
-            draw, pointers, bullet_font, max_text_width,
-            line_spacing=line_spacing, between_bullets=between_bullets
-        )
-    
     # Calculate vertical centering of content
     total_content_height = actual_heading_height + heading_bullet_gap + bullets_height
     vertical_padding = max(0, (available_height - total_content_height) // 2)
@@ -234,17 +319,107 @@ def calculate_dynamic_layout(draw, heading, pointers, fonts_config, dimensions):
     }
 
 # ----------------- Post Generator -----------------
-def create_instagram_post(post_count, news_item, analysis_result):
+FONTS_CONFIG = {
+    'heading_path': "fonts/Roboto/static/Roboto-Bold.ttf",
+    'bullet_path': "fonts/Roboto/static/Roboto_Condensed-Regular.ttf",
+    'watermark_path': "fonts/Roboto/static/Roboto-SemiBoldItalic.ttf",
+    'heading_min': 32,
+    'heading_max': 56,
+    'bullet_min': 20,
+    'bullet_max': 32
+}
+
+POST_SIZE = (1080, 1080)
+POST_BG = (37, 43, 77)
+
+def preload_news_fonts():
+    """Load every font size the layout search can pick, once per process."""
+    preload_fonts([
+        (FONTS_CONFIG['heading_path'], range(FONTS_CONFIG['heading_min'], FONTS_CONFIG['heading_max'] + 1)),
+        (FONTS_CONFIG['bullet_path'], [10] + list(range(FONTS_CONFIG['bullet_min'], FONTS_CONFIG['bullet_max'] + 1))),
+        (FONTS_CONFIG['watermark_path'], [30]),
+    ])
+
+def format_heading(heading):
+    return (heading or "").upper().strip()
+
+# ----------------- Static post template -----------------
+WATERMARK_TEXT = "mks_newslines"
+GLOBE_PATH = "logos/globe.png"
+
+def build_news_template(size, bg):
+    """Background with the watermark (globe icon, shadow, text), the same on every post."""
+    IMG_W, IMG_H = size
+    final_img = Image.new("RGBA", (IMG_W, IMG_H), bg + (255,))
+    draw = ImageDraw.Draw(final_img)
+    watermark_font = get_font(FONTS_CONFIG['watermark_path'], 30)
+    ascent, descent = watermark_font.getmetrics()
+    
+    # Draw watermark at bottom with proper spacing
+    wm_text = WATERMARK_TEXT
+    globe_img = Image.open(GLOBE_PATH).convert("RGBA") if os.path.exists(GLOBE_PATH) else None
+    
+    text_height = ascent + descent
+    text_w = draw.textlength(wm_text, font=watermark_font)
+    
+    if globe_img:
+        icon_size = int(text_height * 0.90)
+        globe_icon = globe_img.resize((icon_size, icon_size), Image.LANCZOS)
+    else:
+        icon_size = 0
+        globe_icon = None
+    
+    spacing = 5
+    total_w = (icon_size + spacing + text_w) if globe_icon else text_w
+    wm_x = int((IMG_W - total_w) // 2)
+    wm_y = IMG_H - (text_height + 30)  # Fixed bottom margin
+    
+    # Watermark shadow
+    wm_shadow = ShadowLayer(final_img.size, blur_radius=8, passes=6, offset=5)
+    if globe_icon:
+        wm_shadow.add_mask((wm_x, wm_y + int((text_height - icon_size) / 2)), globe_icon.split()[3])
+    
+    text_base_x = wm_x + (icon_size + spacing if globe_icon else 0)
+    wm_shadow.add_text((text_base_x, wm_y), wm_text, watermark_font)
+    wm_shadow.composite(final_img)
+    
+    # Draw watermark
+    if globe_icon:
+        icon_y = wm_y + (text_height - icon_size) // 2
+        final_img.paste(globe_icon, (wm_x + 2, icon_y + 2), globe_icon)
+    
+    draw.text((text_base_x, wm_y), wm_text, font=watermark_font, fill="white")
+    return final_img
+
+def news_template(size, bg):
+    return get_template("news_post", build_news_template,
+                        assets=(GLOBE_PATH, FONTS_CONFIG['watermark_path']), size=size, bg=bg)
+
+def warm_news_renderer():
+    """Fonts and the static template loaded before the first post is rendered."""
+    preload_news_fonts()
+    news_template(POST_SIZE, POST_BG)
+
+@profiling.timer("render.canvas")
+def prepare_post_canvas(news_item, heading=None):
+    """
+    The part of a news post that needs no LLM output: canvas with the article
+    image, fonts and layout dimensions. Given the `heading` it also runs the
+    heading layout, so that can start while the bullets are still generating.
+    """
     # Canvas setup
-    IMG_W, IMG_H = 1080, 1080
+    IMG_W, IMG_H = POST_SIZE
     IMAGE_TARGET_H = int(IMG_H * 0.40)
-    BG = (37, 43, 77)
+    BG = POST_BG
     
-    final_img = Image.new("RGBA", (IMG_W, IMG_H), BG + (255,))
+    # Background and watermark come pre-rendered; only the article content is drawn per post
+    with profiling.timer("render.template_copy"):
+        final_img = news_template((IMG_W, IMG_H), BG).copy()
     draw = ImageDraw.Draw(final_img)
     
     # Load and process article image
-    article = download_image(news_item.get("urlToImage", ""))
+    with profiling.timer("render.image_download"):
+        article = download_image(news_item.get("urlToImage", ""), target_size=(IMG_W, IMAGE_TARGET_H))
     if article:
         ow, oh = article.size
         ratio = min(IMG_W / ow, IMAGE_TARGET_H / oh)
@@ -283,23 +458,13 @@ def create_instagram_post(post_count, news_item, analysis_result):
         final_img.alpha_composite(article, (paste_x, paste_y))
         current_image_height = nh + paste_y
     else:
-        fallback = Image.new("RGBA", (IMG_W, IMG_H), BG + (255,))
-        final_img.alpha_composite(fallback, (0, 0))
         current_image_height = IMG_H * 0.10
     
     # Font configuration
-    fonts_config = {
-        'heading_path': "fonts/Roboto/static/Roboto-Bold.ttf",
-        'bullet_path': "fonts/Roboto/static/Roboto_Condensed-Regular.ttf",
-        'watermark_path': "fonts/Roboto/static/Roboto-SemiBoldItalic.ttf",
-        'heading_min': 32,
-        'heading_max': 56,
-        'bullet_min': 20,
-        'bullet_max': 32
-    }
+    fonts_config = dict(FONTS_CONFIG)
     
     # Prepare watermark font for height calculation
-    watermark_font = ImageFont.truetype(fonts_config['watermark_path'], 30)
+    watermark_font = get_font(fonts_config['watermark_path'], 30)
     ascent, descent = watermark_font.getmetrics()
     watermark_height = ascent + descent + 50  # Include margins
     
@@ -311,58 +476,78 @@ def create_instagram_post(post_count, news_item, analysis_result):
         'watermark_height': watermark_height
     }
     
+    canvas = {
+        'final_img': final_img,
+        'draw': draw,
+        'fonts_config': fonts_config,
+        'watermark_font': watermark_font,
+        'dimensions': dimensions,
+        'heading_layout': None
+    }
+    if heading is not None:
+        canvas['heading_layout'] = calculate_heading_layout(draw, format_heading(heading), fonts_config, dimensions)
+    return canvas
+
+@profiling.timer("render.post")
+def create_instagram_post(post_count, news_item, analysis_result, canvas=None, to_disk=None):
+    """Render a news post. `canvas` from prepare_post_canvas() is used when given.
+    Returns the encoded image bytes, or the file under posts/ with `to_disk`
+    (default POST_SAVE_TO_DISK)."""
+    if canvas is None:
+        canvas = prepare_post_canvas(news_item)
+    final_img = canvas['final_img']
+    draw = canvas['draw']
+    fonts_config = canvas['fonts_config']
+    dimensions = canvas['dimensions']
+    IMG_W, IMG_H = dimensions['width'], dimensions['height']
+    
     # Content preparation
-    heading = (analysis_result.get("heading") or "").upper().strip()
+    heading = format_heading(analysis_result.get("heading"))
     pointers = [p.strip("{}").strip() for p in analysis_result.get("pointers", [])[:4]]
     
     # Calculate dynamic layout
-    layout = calculate_dynamic_layout(draw, heading, pointers, fonts_config, dimensions)
+    layout = calculate_dynamic_layout(draw, heading, pointers, fonts_config, dimensions,
+                                      heading_layout=canvas['heading_layout'])
     
     # Draw source text (top-right corner)
     source_text = news_item.get("source", "") or ""
     if source_text:
-        small_font = ImageFont.truetype(fonts_config['bullet_path'], 10)
-        small_margin = 8
-        source_w = draw.textlength(source_text, font=small_font)
-        source_x = IMG_W - small_margin - int(source_w)
-        source_y = small_margin
-        
-        # Semi-transparent background
-        bbox = draw.textbbox((0, 0), source_text, font=small_font)
-        tw = bbox[2] - bbox[0]
-        th = bbox[3] - bbox[1]
-        
-        rect = Image.new("RGBA", (IMG_W, IMG_H), (0, 0, 0, 0))
-        rd = ImageDraw.Draw(rect)
-        rd.rounded_rectangle(
-            (source_x - 8, source_y - 4, source_x + tw + 8, source_y + th + 4),
-            radius=6, fill=(0, 0, 0, 120)
-        )
-        final_img = Image.alpha_composite(final_img, rect)
-        draw = ImageDraw.Draw(final_img)
-        draw.text((source_x, source_y), source_text, font=small_font, fill=(255, 255, 255, 220))
+        with profiling.timer("render.source_badge"):
+            small_font = get_font(fonts_config['bullet_path'], 10)
+            small_margin = 8
+            source_w = draw.textlength(source_text, font=small_font)
+            source_x = IMG_W - small_margin - int(source_w)
+            source_y = small_margin
+            
+            # Semi-transparent background
+            bbox = draw.textbbox((0, 0), source_text, font=small_font)
+            tw = bbox[2] - bbox[0]
+            th = bbox[3] - bbox[1]
+            
+            rect = Image.new("RGBA", (IMG_W, IMG_H), (0, 0, 0, 0))
+            rd = ImageDraw.Draw(rect)
+            rd.rounded_rectangle(
+                (source_x - 8, source_y - 4, source_x + tw + 8, source_y + th + 4),
+                radius=6, fill=(0, 0, 0, 120)
+            )
+            final_img = Image.alpha_composite(final_img, rect)
+            draw = ImageDraw.Draw(final_img)
+            draw.text((source_x, source_y), source_text, font=small_font, fill=(255, 255, 255, 220))
     
     # Draw heading with dynamic positioning
     y = layout['heading_y']
+    heading_shadow = ShadowLayer(final_img.size, blur_radius=6, passes=4, offset=4)
+    heading_rows = []
     for line in layout['heading_lines']:
-        # Shadow effect
-        shadow_layer = Image.new("RGBA", final_img.size, (0, 0, 0, 0))
-        shadow_draw = ImageDraw.Draw(shadow_layer)
-        for offset in range(4):
-            shadow_draw.text(
-                (layout['left_pad'] + 4 + offset, y + 4 + offset),
-                line,
-                font=layout['heading_font'],
-                fill=(0, 0, 0, 200)
-            )
-        shadow_layer = shadow_layer.filter(ImageFilter.GaussianBlur(6))
-        final_img.alpha_composite(shadow_layer)
-        draw = ImageDraw.Draw(final_img)
-        
-        # Draw heading text
-        draw.text((layout['left_pad'], y), line, font=layout['heading_font'], fill=(255, 223, 0))
+        heading_shadow.add_text((layout['left_pad'], y), line, layout['heading_font'])
+        heading_rows.append((y, line))
         bbox = draw.textbbox((0, 0), line, font=layout['heading_font'])
         y += (bbox[3] - bbox[1]) + 15
+    # Shadow effect, then heading text
+    with profiling.timer("render.heading"):
+        heading_shadow.composite(final_img)
+        for y, line in heading_rows:
+            draw.text((layout['left_pad'], y), line, font=layout['heading_font'], fill=(255, 223, 0))
     
     # Draw bullets with dynamic spacing
     bullet_colors = [(255, 255, 255)] * len(layout['wrapped_bullets'])
@@ -379,63 +564,8 @@ def create_instagram_post(post_count, news_item, analysis_result):
         between_bullets=layout['between_bullets']
     )
     
-    # Draw watermark at bottom with proper spacing
-    wm_text = "mks_newslines"
-    globe_path = "logos/globe.png"
-    globe_img = Image.open(globe_path).convert("RGBA") if os.path.exists(globe_path) else None
-    
-    text_height = ascent + descent
-    text_w = draw.textlength(wm_text, font=watermark_font)
-    
-    if globe_img:
-        icon_size = int(text_height * 0.90)
-        globe_icon = globe_img.resize((icon_size, icon_size), Image.LANCZOS)
-    else:
-        icon_size = 0
-        globe_icon = None
-    
-    spacing = 5
-    total_w = (icon_size + spacing + text_w) if globe_icon else text_w
-    wm_x = int((IMG_W - total_w) // 2)
-    wm_y = IMG_H - (text_height + 30)  # Fixed bottom margin
-    
-    # Watermark shadow
-    shadow_layer = Image.new("RGBA", final_img.size, (0, 0, 0, 0))
-    shadow_draw = ImageDraw.Draw(shadow_layer)
-    
-    if globe_icon:
-        icon_mask = globe_icon.split()[3]
-        black_icon = Image.new("RGBA", globe_icon.size, (0, 0, 0, 200))
-        for offset in range(6):
-            ox = wm_x + 5 + offset
-            oy = wm_y + 5 + offset + int((text_height - icon_size) / 2)
-            shadow_layer.paste(black_icon, (ox, oy), icon_mask)
-    
-    text_base_x = wm_x + (icon_size + spacing if globe_icon else 0)
-    for offset in range(6):
-        shadow_draw.text(
-            (text_base_x + 5 + offset, wm_y + 5 + offset),
-            wm_text,
-            font=watermark_font,
-            fill=(0, 0, 0, 200)
-        )
-    
-    shadow_layer = shadow_layer.filter(ImageFilter.GaussianBlur(8))
-    final_img = Image.alpha_composite(final_img.convert("RGBA"), shadow_layer)
-    draw = ImageDraw.Draw(final_img)
-    
-    # Draw watermark
-    if globe_icon:
-        icon_y = wm_y + (text_height - icon_size) // 2
-        final_img.paste(globe_icon, (wm_x + 2, icon_y + 2), globe_icon)
-    
-    draw.text((text_base_x, wm_y), wm_text, font=watermark_font, fill="white")
-    
-    # Save post
-    os.makedirs("posts", exist_ok=True)
-    filename = f"posts/post{post_count}_{news_item.get('source','source')}.png"
-    final_img.save(filename)
-    return filename
+    # Encode post
+    return export_post(final_img, f"posts/post{post_count}_{news_item.get('source','source')}", to_disk=to_disk)
 
 def generate_caption(news_item, analysis_result):
     pointers_text = "\n".join([f"• {p}" for p in analysis_result['pointers']])
@@ -449,37 +579,185 @@ def generate_caption(news_item, analysis_result):
 Hashtags: {analysis_result['hashtags']}
 """
 
+# Fields of a news item each prompt actually uses, everything else stays out of the request
+SELECTOR_FIELDS = ("title", "url")
+ANALYSIS_FIELDS = ("title", "article_text")
+
+def is_valid_analysis(result):
+    """An analysis needs a heading, at least one pointer and a hashtag string."""
+    return (
+        isinstance(result, dict)
+        and isinstance(result.get("heading"), str) and bool(result["heading"].strip())
+        and isinstance(result.get("pointers"), list) and bool(result["pointers"])
+        and all(isinstance(p, str) for p in result["pointers"])
+        and isinstance(result.get("hashtags"), str)
+    )
+
+# ----------------- Post pipeline -----------------
+async def run_post_pipeline(selected_news, telegram_token):
+    """
+    Fetch -> analyze -> render -> publish, with every stage running concurrently.
+    Article bodies are analyzed as soon as they arrive (or all in one batched
+    request once fetched, with NEWS_ANALYSIS_BATCH), analyses run
+    concurrently under the llm_api rate limits, rendering happens on a worker pool and each post is uploaded
+    as soon as it is rendered. Bounded queues between the stages keep a fast
+    stage from running too far ahead of a slow one.
+    """
+    loop = asyncio.get_running_loop()
+    fetched_queue = asyncio.Queue()
+    render_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    publish_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    render_pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS)
+    post_numbers = itertools.count()
+
+    def on_article(article):
+        # Called from the fetcher thread as each body arrives
+        if article["fetch_status"] != FETCH_OK:
+            # The body is only an error placeholder, not worth an analysis and a post
+            print(f"WARNING: skipping {article['url']}, article fetch {article['fetch_status']}")
+            return
+        loop.call_soon_threadsafe(fetched_queue.put_nowait, article)
+
+    async def fetch_stage():
+        try:
+            await asyncio.to_thread(fetch_article_bodies, selected_news, on_article=on_article)
+        finally:
+            await fetched_queue.put(None)
+
+    async def analyze_streaming(full_article):
+        canvas_future = None
+        analyzed_news = None
+        async for event, key, value in stream_llm_json_async(
+            ANALYZE_NEWS_ARTICLE_PROMPT, full_article, fields=ANALYSIS_FIELDS
+        ):
+            if event == "field" and key == "heading" and canvas_future is None:
+                # Image download and heading layout run while the bullets are still streaming
+                canvas_future = loop.run_in_executor(render_pool, prepare_post_canvas, full_article, value)
+            elif event == "done":
+                analyzed_news = value
+        return analyzed_news, canvas_future
+
+    async def analyze(full_article):
+        print(f"INFO: {full_article}")
+        canvas_future = None
+        try:
+            if NEWS_ANALYSIS_STREAM:
+                analyzed_news, canvas_future = await analyze_streaming(full_article)
+            else:
+                analyzed_news = await call_llm_async(ANALYZE_NEWS_ARTICLE_PROMPT, full_article, fields=ANALYSIS_FIELDS)
+        except Exception as e:
+            print(f"ERROR : analysis failed for {full_article['url']}: {e}")
+            return
+        print(f"INFO: {analyzed_news}")
+        await render_queue.put((full_article, analyzed_news, canvas_future))
+
+    async def analyze_batch_stage():
+        # One request for every fetched story, per-story calls only for bad entries
+        articles = []
+        while True:
+            full_article = await fetched_queue.get()
+            if full_article is None:
+                break
+            print(f"INFO: {full_article}")
+            articles.append(full_article)
+        analyses = await call_llm_batch_async(
+            ANALYZE_NEWS_ARTICLES_BATCH_PROMPT, articles, is_valid_analysis, ANALYZE_NEWS_ARTICLE_PROMPT,
+            fields=ANALYSIS_FIELDS
+        )
+        for full_article, analyzed_news in zip(articles, analyses):
+            if analyzed_news is None:
+                print(f"ERROR : analysis failed for {full_article['url']}")
+                continue
+            print(f"INFO: {analyzed_news}")
+            await render_queue.put((full_article, analyzed_news, None))
+
+    async def analyze_stage():
+        if NEWS_ANALYSIS_BATCH:
+            return await analyze_batch_stage()
+        tasks = []
+        while True:
+            full_article = await fetched_queue.get()
+            if full_article is None:
+                break
+            tasks.append(asyncio.create_task(analyze(full_article)))
+        await asyncio.gather(*tasks)
+
+    async def render_worker():
+        while True:
+            job = await render_queue.get()
+            if job is None:
+                break
+            full_article, analyzed_news, canvas_future = job
+            try:
+                canvas = await canvas_future if canvas_future else None
+                post_file = await loop.run_in_executor(
+                    render_pool, create_instagram_post, next(post_numbers), full_article, analyzed_news, canvas
+                )
+                caption = generate_caption(news_item=full_article, analysis_result=analyzed_news)
+            except Exception as e:
+                print(f"ERROR : rendering failed for {full_article['url']}: {e}")
+                continue
+            await publish_queue.put((full_article, post_file, caption))
+
+    async def publish_stage():
+        while True:
+            job = await publish_queue.get()
+            if job is None:
+                break
+            full_article, post_file, caption = job
+            try:
+                await asyncio.to_thread(send_image_to_telegram, post_file, f"{caption}", telegram_token)
+            except Exception as e:
+                # Keep draining the queue, or the render workers block on a full one
+                print(f"ERROR : publishing failed for {full_article['url']}: {e}")
+
+    renderers = [asyncio.create_task(render_worker()) for _ in range(RENDER_WORKERS)]
+    publisher = asyncio.create_task(publish_stage())
+    try:
+        await asyncio.gather(fetch_stage(), analyze_stage())
+        for _ in renderers:
+            await render_queue.put(None)
+        await asyncio.gather(*renderers)
+        await publish_queue.put(None)
+        await publisher
+    finally:
+        render_pool.shutdown(wait=False)
+
 # ----------------- Async main -----------------
 async def main():
     telegram_token = os.getenv("TELEGRAM_NEWSBOT_TOKEN")
+    profiling.start_run()
+    preload_news_fonts()
     try:
-        # Fetch articles
-        news_data = fetch_newapi_articles(query=os.getenv("NEWS_QUERY", "Geopolitics"))
+        # Fetch headlines only, bodies are downloaded for the selected stories
+        news_data = fetch_newapi_headlines(query=os.getenv("NEWS_QUERY", "Geopolitics"))
         
-        # Use LLM to select viral articles
-        articles_for_llm = json.dumps([{"title": n['title'], "url": n['url']} for n in news_data])
-        llm_selected_articles = call_llm(VIRAL_NEWS_SELECTOR_PROMPT, articles_for_llm)
+        # One story per event: outlets rerunning the same news would waste selector tokens and posts
+        with profiling.timer("news.dedup"):
+            news_data = dedupe_stories(news_data)
         
-        post_count = 0
+        # Only the best locally scored stories reach the selector, its cost no longer grows with the feed
+        with profiling.timer("news.rank"):
+            news_data = top_stories(news_data)
+        
+        # Use LLM to select viral articles
+        llm_selected_articles = await call_llm_async(VIRAL_NEWS_SELECTOR_PROMPT, news_data, fields=SELECTOR_FIELDS)
         
+        news_by_url = {item["url"]: item for item in news_data}
+        selected_news = []
         for news in llm_selected_articles:
-            full_article = next((item for item in news_data if item["url"] == news['url']), None)
-            print(f"INFO: {full_article}")
-            
+            full_article = news_by_url.pop(news.get('url'), None)
             if full_article:
-                analyzed_news = call_llm(ANALYZE_NEWS_ARTICLE_PROMPT, full_article)
-                print(f"INFO: {analyzed_news}")
-                
-                post_file = create_instagram_post(post_count, full_article, analyzed_news)
-                caption = generate_caption(news_item=full_article, analysis_result=analyzed_news)
-                send_image_to_telegram(f"{post_file}", f"{caption}", telegram_token)
-                
-                post_count += 1
-                if post_count == 5:
-                    break
+                selected_news.append(full_article)
+        
+        await run_post_pipeline(selected_news[:MAX_NEWS_POSTS], telegram_token)
                     
     except Exception as e:
         print(f"ERROR : {e}")
+    print(f"INFO: HTTP cache {http_cache.cache_stats()}")
+    print(f"INFO: LLM cache {llm_cache.cache_stats()}")
+    print(f"INFO: LLM payload {payload.payload_stats()}")
+    profiling.finish_run()
     # import temp
     # post_file = create_instagram_post(post_count=1, news_item=temp.full_article, analysis_result=temp.analyzed_news)
     # send_image_to_telegram(f"{post_file}", f"test", telegram_token)
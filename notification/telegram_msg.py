@@ -1,6 +1,7 @@
 import telegram
 import os
 import requests
+from utils import http_client, profiling
 
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_BOT_CHAT_ID")
 TELEGRAM_MAX_LEN = 4096  # Telegram hard cap
@@ -24,22 +25,36 @@ def fmt_price(val):
     return "N/A" if val in (None, "", "null") else str(val)
 
 
-def send_image_to_telegram(image_path, caption='Your image post is ready!',token=None):
+IMAGE_SIGNATURES = [(b"\x89PNG", "post.png"), (b"\xff\xd8", "post.jpg"), (b"RIFF", "post.webp")]
+
+def _photo_upload(data):
+    """Multipart file entry for encoded image bytes, named after their format."""
+    name = next((n for sig, n in IMAGE_SIGNATURES if data.startswith(sig)), "post")
+    return (name, data)
+
+@profiling.timer("telegram.send_photo")
+def send_image_to_telegram(image, caption='Your image post is ready!',token=None):
     """
-    Sends an image file to a specified Telegram chat.
+    Sends an image to a specified Telegram chat.
+    `image` is a file path, the encoded image bytes or a binary file-like object.
     """
-    image_path = os.path.abspath(image_path)
     url = f'https://api.telegram.org/bot{token}/sendPhoto'
-    with open(image_path, 'rb') as image_file:
-        files = {'photo': image_file}
-        data = {'chat_id': TELEGRAM_CHAT_ID, 'caption': caption}
-        
-        try:
-            response = requests.post(url, files=files, data=data)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            print("Image sent to Telegram successfully!")
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to send image: {e}")
+    data = {'chat_id': TELEGRAM_CHAT_ID, 'caption': caption}
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        files = {'photo': _photo_upload(bytes(image))}
+    elif hasattr(image, 'read'):
+        files = {'photo': _photo_upload(image.read())}
+    else:
+        with open(os.path.abspath(image), 'rb') as image_file:
+            files = {'photo': (os.path.basename(image), image_file.read())}
+    
+    profiling.count("telegram.upload_bytes", len(files['photo'][1]))
+    try:
+        response = http_client.post(url, files=files, data=data)
+        response.raise_for_status()  # Raise an exception for bad status codes
+        print("Image sent to Telegram successfully!")
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to send image: {e}")
 
 async def send_portfolio_analysis(bot: telegram.Bot, analysis_json: dict):
     """Send formatted portfolio analysis according to the strict JSON schema."""
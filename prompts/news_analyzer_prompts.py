@@ -24,6 +24,36 @@ Return the result strictly in JSON format as shown:
 }
 """
 
+ANALYZE_NEWS_ARTICLES_BATCH_PROMPT = """
+You are a professional news content creator for Instagram.
+You will receive a JSON array of news articles as Data. Every article has an "id", a title and its content.
+For EACH article, independently of the others:
+1. Read and analyze the article.
+2. Write a concise, captivating, and engaging summary suitable for an Instagram post.
+    - Start with a single, short and compelling headline.
+    - Follow the headline with a list of 2 to 3 key bullet points.
+    - Identify the single most impactful point and wrap it in curly braces {} to highlight it.
+    - Ensure the overall text is engaging and easy to read.
+3. Generate a set of highly relevant and trending hashtags that can maximize reach for the post.
+    - Include both general hashtags (#news, #breaking, #trending) and topic-specific hashtags (e.g., #finance, #leadership, #tech, depending on article).
+
+Return the result strictly as a JSON array with exactly one object per article, in the same order,
+each object carrying the "id" of its article, as shown:
+
+[
+  {
+    "id": "0",
+    "heading": "Your captivating news headline here.",
+    "pointers": [
+      "First key point.",
+      "Second key point, with the most impactful point like {this one}.",
+      "Third key point."
+    ],
+    "hashtags": "#hashtag1 #hashtag2 #hashtag3 ..."
+  }
+]
+"""
+
 VIRAL_NEWS_SELECTOR_PROMPT = """
 Analyze the following list of news headlines and their summaries. Your goal is to identify the top 5 most viral and attention-grabbing topics that would perform well on social media platforms like Instagram.
 
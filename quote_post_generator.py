@@ -1,4 +1,4 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import os
 import datetime
 import re
@@ -6,32 +6,30 @@ import random
 from prompts.insta_quote_prompt import QUOTES_PROMPT
 from llm_api.openaiAPI import call_llm_text_output
 from notification.telegram_msg import send_image_to_telegram
-
-
-def create_quote_post(quote, output_dir="posts", logo_path="logos/ai_robo_logo.png"):
-    os.makedirs(output_dir, exist_ok=True)
-
-    # --- Random Background (Black or White) ---
-    bg_color_name = random.choice(["black", "black"])
-    bg_color = (0, 0, 0) if bg_color_name == "black" else (255, 255, 255)
-    text_default_color = (255, 255, 255) if bg_color_name == "black" else (0, 0, 0)
-    highlight_color = (255, 230, 50) if bg_color_name == "black" else (255, 140, 0)
-
-    # Create background
-    img_size = 1080
+from utils.font_registry import get_font, preload_fonts
+from utils.post_templates import get_template
+from utils.image_output import export_post
+
+IMG_SIZE = 1080
+FONT_SIZE = 42
+FONT_NORMAL_PATH = "fonts/Lato/Lato-Regular.ttf"
+FONT_BOLD_PATH = "fonts/Lato/Lato-Bold.ttf"
+FONT_WATERMARK_PATH = "fonts/Lato/Lato-Italic.ttf"
+DEFAULT_LOGO_PATH = "logos/ai_robo_logo.png"
+
+QUOTE_FONTS = [
+    (FONT_NORMAL_PATH, [FONT_SIZE]),
+    (FONT_BOLD_PATH, [FONT_SIZE]),
+    (FONT_WATERMARK_PATH, [24, 30]),
+]
+
+
+def build_quote_template(bg_color, logo_path):
+    """Background with logo, caption and watermark, the same on every quote post."""
+    img_size = IMG_SIZE
     img = Image.new("RGB", (img_size, img_size), color=bg_color)
     draw = ImageDraw.Draw(img)
 
-    # --- Fonts ---
-    font_normal_path = "fonts/Lato/Lato-Regular.ttf"
-    font_bold_path = "fonts/Lato/Lato-Bold.ttf"
-    font_watermark_path = "fonts/Lato/Lato-Italic.ttf"
-
-    font_size = 42
-    font_normal = ImageFont.truetype(font_normal_path, font_size)
-    font_bold = ImageFont.truetype(font_bold_path, font_size)
-    max_width = int(img_size * 0.7)  # reduced width
-
     # --- Logo + Caption ---
     logo_bottom = 100
     if os.path.exists(logo_path):
@@ -43,7 +41,7 @@ def create_quote_post(quote, output_dir="posts", logo_path="logos/ai_robo_logo.p
         logo_x = (img_size - logo_width) // 2
         logo_y = 100
         img.paste(logo, (logo_x, logo_y), logo)
-        font_small = ImageFont.truetype(font_watermark_path, 24)
+        font_small = get_font(FONT_WATERMARK_PATH, 24)
         caption = "AI speaking"
         cap_w = draw.textlength(caption, font=font_small)
         cap_x = (img_size - cap_w) // 2
@@ -51,6 +49,50 @@ def create_quote_post(quote, output_dir="posts", logo_path="logos/ai_robo_logo.p
         draw.text((cap_x, cap_y), caption, font=font_small, fill=(180, 180, 180))
         logo_bottom = cap_y + 60
 
+    # --- Watermark ---
+    line_height = get_font(FONT_NORMAL_PATH, FONT_SIZE).getbbox("A")[3] + 25
+    font_watermark = get_font(FONT_WATERMARK_PATH, 30)
+    watermark_text = "@mksmindset"
+    wm_w = draw.textlength(watermark_text, font=font_watermark)
+    wm_x = (img_size - wm_w) / 2
+    wm_y = img_size - (line_height // 2) - 60
+    draw.text((wm_x, wm_y), watermark_text, font=font_watermark, fill=(180, 180, 180))
+    return img, logo_bottom
+
+
+def quote_template(bg_color, logo_path):
+    return get_template("quote_post", build_quote_template,
+                        assets=(logo_path, FONT_WATERMARK_PATH), bg_color=bg_color, logo_path=logo_path)
+
+
+def warm_quote_renderer(logo_path=DEFAULT_LOGO_PATH):
+    """Fonts and the static template loaded before the first quote is rendered."""
+    preload_fonts(QUOTE_FONTS)
+    quote_template((0, 0, 0), logo_path)
+
+
+def create_quote_post(quote, output_dir="posts", logo_path=DEFAULT_LOGO_PATH, index=None, to_disk=None):
+    """Render a quote post. `index` is added to the file name when rendering several at once.
+    Returns the encoded image bytes, or the file under `output_dir` with `to_disk`
+    (default POST_SAVE_TO_DISK)."""
+
+    # --- Random Background (Black or White) ---
+    bg_color_name = random.choice(["black", "black"])
+    bg_color = (0, 0, 0) if bg_color_name == "black" else (255, 255, 255)
+    text_default_color = (255, 255, 255) if bg_color_name == "black" else (0, 0, 0)
+    highlight_color = (255, 230, 50) if bg_color_name == "black" else (255, 140, 0)
+
+    # Background, logo and watermark come pre-rendered; only the quote is drawn per post
+    img_size = IMG_SIZE
+    template, logo_bottom = quote_template(bg_color, logo_path)
+    img = template.copy()
+    draw = ImageDraw.Draw(img)
+
+    # --- Fonts ---
+    font_normal = get_font(FONT_NORMAL_PATH, FONT_SIZE)
+    font_bold = get_font(FONT_BOLD_PATH, FONT_SIZE)
+    max_width = int(img_size * 0.7)  # reduced width
+
     # --- Text Wrapping Helper ---
     def wrap_text(text, font, max_width):
         words = text.split()
@@ -97,23 +139,18 @@ def create_quote_post(quote, output_dir="posts", logo_path="logos/ai_robo_logo.p
         draw.text((x, y), line, font=font_to_use, fill=fill_color)
         y += line_height
 
-    # --- Watermark ---
-    font_watermark = ImageFont.truetype(font_watermark_path, 30)
-    watermark_text = "@mksmindset"
-    wm_w = draw.textlength(watermark_text, font=font_watermark)
-    wm_x = (img_size - wm_w) / 2
-    wm_y = img_size - (line_height // 2) - 60
-    draw.text((wm_x, wm_y), watermark_text, font=font_watermark, fill=(180, 180, 180))
-
-    # --- Save ---
-    filename = f"{output_dir}/quote_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-    img.save(filename)
-    print(f"✅ Post saved: {filename}")
-    return filename
+    # --- Encode / Save ---
+    suffix = f"_{index}" if index is not None else ""
+    post = export_post(img, f"{output_dir}/quote_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}",
+                       to_disk=to_disk)
+    if isinstance(post, str):
+        print(f"✅ Post saved: {post}")
+    return post
 
 
 if __name__ == "__main__":
     print("INFO: Generating Quotes...")
+    preload_fonts(QUOTE_FONTS)
 
     # Get the AI output
     output = call_llm_text_output(QUOTES_PROMPT)
@@ -125,5 +162,5 @@ if __name__ == "__main__":
     hashtags = match.group(2).strip()
 
     # Create Instagram post image with quote only
-    filename = create_quote_post(quote_text)
-    send_image_to_telegram(f"{filename}", f"{hashtags}", os.getenv("TELEGRAM_QUOTEBOT_TOKEN"))
+    post = create_quote_post(quote_text)
+    send_image_to_telegram(post, f"{hashtags}", os.getenv("TELEGRAM_QUOTEBOT_TOKEN"))
@@ -0,0 +1,99 @@
+# utils/article_extractor.py
+import re
+from io import BytesIO
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# Containers whose paragraphs are never article text
+BOILERPLATE_TAGS = {"nav", "footer", "header", "aside", "form", "noscript", "figcaption"}
+NEGATIVE_HINTS = re.compile(
+    r"nav|menu|footer|header|sidebar|comment|share|social|related|recommend|promo|"
+    r"subscribe|newsletter|signup|cookie|consent|advert|sponsor|banner|breadcrumb|"
+    r"byline|caption|widget|popup|modal|trending|most-read|outbrain|taboola",
+    re.I,
+)
+POSITIVE_HINTS = re.compile(r"article|content|story|body|post|entry|main|text", re.I)
+MIN_PARAGRAPH_CHARS = 25
+MAX_LINK_DENSITY = 0.5
+CONTAINER_KEEP_RATIO = 0.25  # keep containers scoring at least this share of the best one
+
+def extract_with_bs4(html):
+    """Original extractor: html.parser and every <p> on the page."""
+    soup = BeautifulSoup(html, "html.parser")
+    paragraphs = [p.get_text() for p in soup.find_all("p")]
+    return "\n".join(paragraphs).strip()
+
+def _hints(elem):
+    return f"{elem.get('class') or ''} {elem.get('id') or ''}"
+
+def _paragraph_score(p):
+    """Score one <p>; None means boilerplate that must be dropped."""
+    text = " ".join("".join(p.itertext()).split())
+    if len(text) < MIN_PARAGRAPH_CHARS:
+        return None, text
+
+    link_chars = sum(len("".join(a.itertext())) for a in p.iter("a"))
+    if link_chars / len(text) > MAX_LINK_DENSITY:
+        return None, text
+
+    score = 1 + len(text) / 100 + text.count(",")
+    for ancestor in p.iterancestors():
+        tag = ancestor.tag if isinstance(ancestor.tag, str) else ""
+        if tag in ("body", "html"):
+            break  # page-level classes say nothing about this paragraph
+        if tag in BOILERPLATE_TAGS:
+            return None, text
+        hints = _hints(ancestor)
+        if NEGATIVE_HINTS.search(hints):
+            return None, text
+        if tag == "article" or POSITIVE_HINTS.search(hints):
+            score *= 1.5
+            break
+    return score, text
+
+def extract_with_lxml(html):
+    """
+    Streaming extractor: lxml iterparse over <p> end events with boilerplate
+    scoring. Paragraphs are scored on their own (length, commas, link density,
+    class/id hints of their ancestors) and grouped by parent container; only
+    containers close to the best scoring one are kept, in document order.
+    """
+    if isinstance(html, str):
+        source, encoding = BytesIO(html.encode("utf-8")), "utf-8"
+    else:
+        source, encoding = BytesIO(html), None
+
+    kept = []            # (container, score, text) in document order
+    containers = {}      # container element -> summed score
+    try:
+        for _, p in etree.iterparse(source, events=("end",), tag="p", html=True,
+                                    recover=True, encoding=encoding, no_network=True):
+            score, text = _paragraph_score(p)
+            parent = p.getparent()
+            if score is not None:
+                kept.append((parent, score, text))
+                containers[parent] = containers.get(parent, 0) + score
+            # Free the parsed paragraph and the siblings already seen before it
+            p.clear(keep_tail=True)
+            if parent is not None:
+                while p.getprevious() is not None:
+                    del parent[0]
+    except etree.LxmlError:
+        pass  # keep whatever was parsed from a truncated or broken page
+
+    if not containers:
+        return ""
+    best = max(containers.values())
+    return "\n".join(
+        text for parent, _, text in kept if containers[parent] >= best * CONTAINER_KEEP_RATIO
+    ).strip()
+
+# Extraction engines by name; add an entry here to plug in another one
+EXTRACTORS = {
+    "bs4": extract_with_bs4,
+    "lxml": extract_with_lxml,
+}
+
+def extract_article_text(html, engine="lxml"):
+    """Extract readable article text from an HTML page (str or bytes)."""
+    return EXTRACTORS[engine](html)
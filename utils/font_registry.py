@@ -0,0 +1,63 @@
+# utils/font_registry.py
+import threading
+import weakref
+from io import BytesIO
+from collections import OrderedDict
+from PIL import ImageFont
+from config import FONT_CACHE_SIZE
+
+_lock = threading.Lock()
+_font_files = {}            # path -> TTF bytes, read from disk once
+_fonts = OrderedDict()      # (path, size) -> FreeTypeFont, least recently used first
+_stats = {"hits": 0, "misses": 0}
+_word_widths = weakref.WeakKeyDictionary()  # font -> {word: pixel width}
+
+def _font_bytes(path):
+    with _lock:
+        data = _font_files.get(path)
+    if data is None:
+        with open(path, "rb") as f:
+            data = f.read()
+        with _lock:
+            _font_files[path] = data
+    return data
+
+def get_font(path, size):
+    """ImageFont.truetype(path, size) through a process-wide LRU cache."""
+    key = (path, size)
+    with _lock:
+        font = _fonts.get(key)
+        if font is not None:
+            _fonts.move_to_end(key)
+            _stats["hits"] += 1
+            return font
+        _stats["misses"] += 1
+
+    font = ImageFont.truetype(BytesIO(_font_bytes(path)), size)
+    with _lock:
+        _fonts[key] = font
+        _fonts.move_to_end(key)
+        while len(_fonts) > FONT_CACHE_SIZE:
+            _fonts.popitem(last=False)
+    return font
+
+def preload_fonts(specs):
+    """Load fonts ahead of rendering. specs is a list of (path, sizes) pairs."""
+    for path, sizes in specs:
+        for size in sizes:
+            get_font(path, size)
+
+def word_width(draw, font, word):
+    """draw.textlength(word) memoized per font object."""
+    widths = _word_widths.get(font)
+    if widths is None:
+        with _lock:
+            widths = _word_widths.setdefault(font, {})
+    width = widths.get(word)
+    if width is None:
+        width = widths[word] = draw.textlength(word, font=font)
+    return width
+
+def font_cache_stats():
+    with _lock:
+        return dict(_stats, cached=len(_fonts))
@@ -0,0 +1,193 @@
+# utils/http_cache.py
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+from utils import http_client
+from config import HTTP_CACHE_DIR, HTTP_CACHE_TTL, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_EVICT_TO
+
+# Bodies are stored once per content hash under bodies/, each URL gets a small
+# JSON record under meta/ pointing at its body. The meta file mtime is the LRU clock.
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", HTTP_CACHE_DIR)
+CACHE_DISABLED = os.getenv("HTTP_CACHE_DISABLED", "") not in ("", "0")
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+_lock = threading.Lock()
+_cache_bytes = None  # total body bytes on disk, computed on first store
+_stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _meta_path(url):
+    return os.path.join(CACHE_DIR, "meta", _sha256(url.encode("utf-8")) + ".json")
+
+def _body_path(digest):
+    return os.path.join(CACHE_DIR, "bodies", digest[:2], digest)
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _load(url):
+    """Return (meta, body) for a cached url, or (None, None)."""
+    try:
+        with open(_meta_path(url), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(_body_path(meta["digest"]), "rb") as f:
+            return meta, f.read()
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+def _touch(url):
+    try:
+        os.utime(_meta_path(url))
+    except OSError:
+        pass
+
+def _as_response(url, meta, body):
+    """Build a requests.Response from a cache record so callers need no changes."""
+    resp = requests.models.Response()
+    resp.status_code = 200
+    resp.reason = "OK"
+    resp.url = url
+    resp._content = body
+    resp.headers = CaseInsensitiveDict(meta.get("headers", {}))
+    resp.encoding = meta.get("encoding")
+    resp.from_cache = True
+    return resp
+
+def _disk_usage():
+    """Return ({digest: size}, [(mtime, meta_path, digest), ...]) for the whole cache."""
+    sizes, records = {}, []
+    meta_dir = os.path.join(CACHE_DIR, "meta")
+    for name in os.listdir(meta_dir) if os.path.isdir(meta_dir) else []:
+        path = os.path.join(meta_dir, name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                digest = json.load(f)["digest"]
+            records.append((os.path.getmtime(path), path, digest))
+            sizes[digest] = os.path.getsize(_body_path(digest))
+        except (OSError, ValueError, KeyError):
+            continue
+    return sizes, records
+
+def evict(max_bytes=HTTP_CACHE_MAX_BYTES, target=None):
+    """
+    Drop least recently used entries until the bodies fit in `target` bytes,
+    HTTP_CACHE_EVICT_TO of max_bytes by default. Freeing more than the
+    overflow leaves room for the next stores, as each eviction scans the cache.
+    """
+    global _cache_bytes
+    if target is None:
+        target = int(max_bytes * HTTP_CACHE_EVICT_TO)
+    with _lock:
+        sizes, records = _disk_usage()
+        refs = {}
+        for _, _, digest in records:
+            refs[digest] = refs.get(digest, 0) + 1
+        total = sum(sizes.values())
+        for _, path, digest in sorted(records):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            _stats["evictions"] += 1
+            refs[digest] -= 1
+            if refs[digest] == 0:
+                try:
+                    os.remove(_body_path(digest))
+                except OSError:
+                    pass
+                total -= sizes.get(digest, 0)
+        _cache_bytes = total
+    return total
+
+def _store(url, resp):
+    global _cache_bytes
+    body = resp.content
+    digest = _sha256(body)
+    body_path = _body_path(digest)
+    added = 0
+    if not os.path.exists(body_path):
+        _write_atomic(body_path, body)
+        added = len(body)
+    meta = {
+        "url": url,
+        "digest": digest,
+        "fetched_at": time.time(),
+        "encoding": resp.encoding,
+        "headers": {h: resp.headers[h] for h in KEPT_HEADERS if h in resp.headers},
+    }
+    _write_atomic(_meta_path(url), json.dumps(meta).encode("utf-8"))
+    _count("stores")
+
+    with _lock:
+        if _cache_bytes is None:
+            _cache_bytes = sum(_disk_usage()[0].values())
+        else:
+            _cache_bytes += added
+        over_limit = _cache_bytes > HTTP_CACHE_MAX_BYTES
+    if over_limit:
+        evict()
+
+def cached_get(url, ttl=HTTP_CACHE_TTL, **kwargs):
+    """
+    GET `url` through the disk cache.
+    Fresh entries (younger than `ttl` seconds) are served without any network
+    call, stale ones are revalidated with If-None-Match / If-Modified-Since.
+    Only 200 responses are cached. Returns a requests.Response either way.
+    """
+    if CACHE_DISABLED or not url:
+        return http_client.get(url, **kwargs)
+
+    meta, body = _load(url)
+    if meta and time.time() - meta["fetched_at"] < ttl:
+        _count("hits")
+        _touch(url)
+        return _as_response(url, meta, body)
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    if meta:
+        cached_headers = meta.get("headers", {})
+        if "ETag" in cached_headers:
+            headers["If-None-Match"] = cached_headers["ETag"]
+        if "Last-Modified" in cached_headers:
+            headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+
+    resp = http_client.get(url, headers=headers, **kwargs)
+    if meta and resp.status_code == 304:
+        _count("revalidated")
+        meta["fetched_at"] = time.time()
+        for h in ("ETag", "Last-Modified"):
+            if h in resp.headers:
+                meta["headers"][h] = resp.headers[h]
+        _write_atomic(_meta_path(url), json.dumps(meta).encode("utf-8"))
+        return _as_response(url, meta, body)
+
+    _count("misses")
+    if resp.status_code == 200:
+        try:
+            _store(url, resp)
+        except OSError as e:
+            print(f"WARNING: could not cache {url}: {e}")
+    return resp
+
+def cache_stats():
+    """Return a copy of the hit/miss counters with the overall hit rate."""
+    stats = dict(_stats)
+    lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+    stats["hit_rate"] = round((stats["hits"] + stats["revalidated"]) / lookups, 3) if lookups else 0.0
+    return stats
@@ -0,0 +1,92 @@
+# utils/http_client.py
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_HOSTS,
+                    HTTP_PER_HOST_LIMIT, HTTP_RETRIES, HTTP_BACKOFF_FACTOR)
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+class JitteredRetry(Retry):
+    """urllib3 Retry whose exponential backoff is spread with random jitter."""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        # "Equal jitter": keep half the delay, randomise the other half
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+def _build_session():
+    retry = JitteredRetry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the last response back, callers use raise_for_status()
+    )
+    # pool_block turns pool_maxsize into a hard per-host connection limit
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_HOSTS,
+        pool_maxsize=HTTP_PER_HOST_LIMIT,
+        pool_block=True,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_session():
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+class ResponseTooLarge(requests.exceptions.RequestException):
+    """The body of a request made with truncate=False is over its max_bytes."""
+
+def request(method, url, timeout=None, max_bytes=None, truncate=True, **kwargs):
+    """
+    Send a request through the shared session with the default timeouts.
+    With `max_bytes` the body is streamed and cut after that many bytes;
+    `resp.truncated` tells whether the cap was reached. With `truncate=False`
+    a bigger body raises ResponseTooLarge instead, before any of it is read
+    when Content-Length already says so.
+    """
+    if max_bytes is None:
+        return get_session().request(method, url, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+
+    resp = get_session().request(method, url, timeout=timeout or DEFAULT_TIMEOUT, stream=True, **kwargs)
+    chunks, size = [], 0
+    try:
+        declared = resp.headers.get("Content-Length", "")
+        if not truncate and declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLarge(f"{url}: Content-Length {declared} over the {max_bytes} byte limit")
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_bytes or (truncate and size == max_bytes):
+                break
+        if not truncate and size > max_bytes:
+            raise ResponseTooLarge(f"{url}: body over the {max_bytes} byte limit")
+    finally:
+        resp.close()
+    resp._content = b"".join(chunks)[:max_bytes]
+    resp.truncated = truncate and size >= max_bytes
+    return resp
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    """POST through the shared session. Only connection errors are retried,
+    so a request the server has already seen is never sent twice."""
+    return request("POST", url, **kwargs)
@@ -0,0 +1,47 @@
+# utils/image_output.py
+import os
+from io import BytesIO
+from utils import profiling
+from config import POST_IMAGE_FORMAT, POST_PNG_COMPRESS_LEVEL, POST_IMAGE_QUALITY, POST_SAVE_TO_DISK
+
+IMAGE_FORMAT = os.getenv("POST_IMAGE_FORMAT", POST_IMAGE_FORMAT).upper()
+SAVE_TO_DISK = os.getenv("POST_SAVE_TO_DISK", "1" if POST_SAVE_TO_DISK else "") not in ("", "0")
+
+EXTENSIONS = {"PNG": "png", "JPEG": "jpg", "WEBP": "webp"}
+
+def _format(fmt):
+    fmt = (fmt or IMAGE_FORMAT).upper()
+    fmt = "JPEG" if fmt == "JPG" else fmt
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"unsupported post image format: {fmt}")
+    return fmt
+
+def encode_image(img, fmt=None, quality=None, compress_level=None):
+    """Encode an image in memory. PNG uses `compress_level` (0-9), JPEG and WebP `quality`."""
+    fmt = _format(fmt)
+    buf = BytesIO()
+    with profiling.timer("image.encode"):
+        if fmt == "PNG":
+            img.save(buf, "PNG", compress_level=POST_PNG_COMPRESS_LEVEL if compress_level is None else compress_level)
+        else:
+            if fmt == "JPEG" and img.mode != "RGB":
+                img = img.convert("RGB")
+            img.save(buf, fmt, quality=quality or POST_IMAGE_QUALITY)
+    profiling.count("image.encoded_bytes", buf.tell())
+    return buf.getvalue()
+
+def export_post(img, path_stem, to_disk=None, fmt=None, **encode_kwargs):
+    """
+    Encode a rendered post once. Returns the bytes, or, with `to_disk`,
+    writes them to `path_stem` plus the format's extension and returns
+    that path. Both are accepted by send_image_to_telegram.
+    """
+    fmt = _format(fmt)
+    data = encode_image(img, fmt, **encode_kwargs)
+    if not (SAVE_TO_DISK if to_disk is None else to_disk):
+        return data
+    filename = f"{path_stem}.{EXTENSIONS[fmt]}"
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with profiling.timer("image.write"), open(filename, "wb") as f:
+        f.write(data)
+    return filename
@@ -0,0 +1,124 @@
+# utils/news_dedup.py
+import re
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer, ENGLISH_STOP_WORDS
+from sklearn.metrics.pairwise import linear_kernel
+from config import NEWS_DEDUP_THRESHOLD, NEWS_DEDUP_SHORT_TERMS, NEWS_DEDUP_SHORT_THRESHOLD
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def story_text(article):
+    """Text a story is compared on: title, description and the body when it is already known."""
+    parts = (article.get("title"), article.get("description"), article.get("article_text"))
+    return ". ".join(p for p in parts if p)
+
+def _stem(word):
+    """Crude suffix stripping so "cuts"/"cut" and "agreed"/"agree" share a term."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word.rstrip("e") or word
+
+def story_terms(text):
+    """Lower-cased, stemmed words of `text` without English stop words."""
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in ENGLISH_STOP_WORDS]
+
+def story_phrases(text):
+    """story_terms plus each pair of neighbouring terms, so word order counts."""
+    terms = story_terms(text)
+    return terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+
+def is_short(article):
+    """Title-only or few-word stories, where one different name is most of the story."""
+    return not article.get("description") or len(story_terms(story_text(article))) < NEWS_DEDUP_SHORT_TERMS
+
+def _containment(a, b):
+    """Share of the smaller set found in the other one."""
+    return len(a & b) / min(len(a), len(b)) if a and b else 0.0
+
+def similarity_matrix(articles):
+    """
+    Pairwise similarity of the stories. Two full stories score the cosine of
+    their word TF-IDF vectors, with the IDF taken from the full stories of
+    `articles`, so names every outlet mentions that day weigh less than the
+    words that set a story apart. A pair with a short story (is_short) scores
+    the share of the shorter story's words and word pairs found in the other:
+    one differing name or a swapped word order ("Israel strikes Iran" vs
+    "Iran strikes Israel") is too much of a headline to count as the same.
+    """
+    n = len(articles)
+    texts = [story_text(a) for a in articles]
+    short = [is_short(a) for a in articles]
+    similarity = np.zeros((n, n))
+    full = [i for i in range(n) if not short[i]]
+    if full:
+        try:
+            vectors = TfidfVectorizer(analyzer=story_terms, sublinear_tf=True).fit_transform([texts[i] for i in full])
+            similarity[np.ix_(full, full)] = linear_kernel(vectors)  # L2-normalized rows: the cosine
+        except ValueError:  # no words at all
+            pass
+    if any(short):
+        phrases = [set(story_phrases(t)) for t in texts]
+        for i in range(n):
+            for j in range(i + 1, n):
+                if short[i] or short[j]:
+                    similarity[i, j] = similarity[j, i] = _containment(phrases[i], phrases[j])
+    return similarity
+
+def merge_thresholds(articles, threshold=NEWS_DEDUP_THRESHOLD, short_threshold=NEWS_DEDUP_SHORT_THRESHOLD):
+    """Pairwise threshold to merge at: `short_threshold` when either story is short, else `threshold`."""
+    short = np.array([is_short(a) for a in articles], dtype=bool)
+    return np.where(short[:, None] | short[None, :], short_threshold, threshold)
+
+def cluster_stories(articles, threshold=NEWS_DEDUP_THRESHOLD, similarity=None):
+    """
+    Group near-duplicate stories. Each article is compared with the leader of
+    every cluster so far, in input order, and joins the first one it is
+    similar enough to (see similarity_matrix and merge_thresholds). Comparing
+    with leaders only keeps chains of loosely related stories from merging.
+    Returns lists of indices into `articles`.
+    """
+    if similarity is None:
+        similarity = similarity_matrix(articles)
+    thresholds = merge_thresholds(articles, threshold)
+
+    clusters = []
+    for i in range(len(articles)):
+        for cluster in clusters:
+            if similarity[cluster[0], i] >= thresholds[cluster[0], i]:
+                cluster.append(i)
+                break
+        else:
+            clusters.append([i])
+    return clusters
+
+def dedupe_stories(articles, threshold=NEWS_DEDUP_THRESHOLD):
+    """
+    Collapse each cluster of near-duplicate stories to one representative:
+    the first (most popular) one with an image, else the first one. The
+    representative gets `duplicates`, the number of other outlets that ran
+    the story. Clusters keep the order of their first story. Every merge is
+    logged with its score, so a wrong one shows up in the run log.
+    """
+    similarity = similarity_matrix(articles)
+    kept = []
+    for cluster in cluster_stories(articles, threshold, similarity):
+        members = [articles[i] for i in cluster]
+        representative = next((a for a in members if a.get("urlToImage")), members[0])
+        representative["duplicates"] = len(members) - 1
+        kept.append(representative)
+        for i in cluster[1:]:
+            print(f"INFO: dedup merged \"{articles[i].get('title')}\" into \"{articles[cluster[0]].get('title')}\" "
+                  f"({similarity[cluster[0], i]:.2f})")
+    dropped = len(articles) - len(kept)
+    if dropped:
+        merged = sum(1 for a in kept if a["duplicates"])
+        print(f"INFO: dedup kept {len(kept)} of {len(articles)} stories, {merged} collapsed from duplicates")
+    return kept
@@ -3,135 +3,266 @@ import requests
 import time
 import os
 import json
-from config import NEWS_API_URL,TRADIENT_NEWS_URL
+from config import NEWS_API_URL, TRADIENT_NEWS_URL, TRADIENT_POLL_STATE_PATH, TRADIENT_POLL_LOOKBACK
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from utils import http_client, http_cache, profiling, news_table
 
-def fetch_all_stock_news():
-    """
-    Fetches latest stock-specific NSE/BSE news from Tradient API.
-    Only includes items where sm_symbol is non-empty and not 'global'.
-    Returns a compact list suitable for LLM input.
-    """
+# ----------------- Tradient stock news -----------------
+def _fetch_tradient_feed():
+    """Raw `latest_news` items of the Tradient feed, [] on errors."""
     try:
-        response = requests.get(TRADIENT_NEWS_URL, timeout=10)
+        response = http_client.get(TRADIENT_NEWS_URL, timeout=10)
         response.raise_for_status()
-        data = response.json().get("data", {}).get("latest_news", [])
+        return response.json().get("data", {}).get("latest_news", [])
     except Exception as e:
         print(f"Error fetching news: {e}")
         return []
 
-    summarized_news = []
-    for item in data:
-        sm_symbol = item.get("sm_symbol", "").strip()
-        nse_scrip_code = str(item.get("nse_scrip_code", "")).strip()
-        bse_scrip_code = str(item.get("bse_scrip_code", "")).strip()
-        if (not sm_symbol or ((not nse_scrip_code or str(nse_scrip_code).strip() == "0") and (not bse_scrip_code or str(bse_scrip_code).strip() == "0"))):
+def _is_stock_item(item):
+    """Stock news has a symbol and a non-zero NSE or BSE scrip code."""
+    if not (item.get("sm_symbol") or "").strip():
+        return False
+    codes = (str(item.get("nse_scrip_code") or "").strip(), str(item.get("bse_scrip_code") or "").strip())
+    return any(code and code != "0" for code in codes)
+
+def _news_id(item):
+    news = item.get("news_object") or {}
+    news_id = item.get("id") or item.get("news_id") or news.get("id")
+    if news_id:
+        return str(news_id)
+    # No id in the payload: the same story has the same symbol, time and title
+    return f"{item.get('sm_symbol', '').strip()}:{item.get('publish_date', 0)}:{news.get('title', '')[:200]}"
+
+def parse_stock_news(items):
+    """
+    Yield one normalized record per stock news item of the raw feed, in feed
+    order. Items without a symbol or scrip code (market-wide news) are skipped.
+    """
+    for item in items:
+        if not _is_stock_item(item):
             continue
+        news = item.get("news_object") or {}
+        publish_ts = item.get("publish_date") or 0
+        yield {
+            "news_id": _news_id(item),
+            "tradingsymbol": item["sm_symbol"].strip(),
+            "nse_scrip_code": str(item.get("nse_scrip_code") or "").strip(),
+            "bse_scrip_code": str(item.get("bse_scrip_code") or "").strip(),
+            "new_headline": (news.get("title") or "")[:200],   # limit title length
+            "summary": (news.get("text") or "")[:1000],         # limit summary length
+            "sentiment": news.get("overall_sentiment") or "",
+            "publish_dt": datetime.fromtimestamp(publish_ts / 1000).strftime("%Y-%m-%d %H:%M:%S") if publish_ts else "",
+            "publish_ts": publish_ts,
+        }
 
-        news = item.get("news_object", {})
-        title = news.get("title", "")[:200]   # limit title length
-        summary = news.get("text", "")[:1000]  # limit summary length
-        sentiment = news.get("overall_sentiment", "")
-        publish_ts = item.get("publish_date", 0)
-        publish_dt = datetime.fromtimestamp(publish_ts / 1000).strftime("%Y-%m-%d %H:%M:%S") if publish_ts else ""
-
-        summarized_news.append({
-            "tradingsymbol": sm_symbol,
-            "new_headline": title,
-            "sentiment": sentiment,
-            # "summary": summary,
-            "publish_dt":publish_dt,
-            "publish_ts":publish_ts,
-        }) 
-    return summarized_news
+def _compact(record, keys):
+    return {key: record[key] for key in keys}
 
-def fetch_positive_stock_news(news_data=None):
+def fetch_all_stock_news():
     """
     Fetches latest stock-specific NSE/BSE news from Tradient API.
     Only includes items where sm_symbol is non-empty and not 'global'.
     Returns a compact list suitable for LLM input.
     """
-    if news_data == None:
+    keys = ("tradingsymbol", "new_headline", "sentiment", "publish_dt", "publish_ts")
+    return [_compact(r, keys) for r in parse_stock_news(_fetch_tradient_feed())]
+
+def fetch_positive_stock_news(news_data=None):
+    """
+    Positive stock news, as a compact list suitable for LLM input. Filters
+    `news_data` (records of fetch_all_stock_news() or StockNewsPoller.poll())
+    when given, else fetches the Tradient feed and also keeps `sentiment`.
+    News without a sentiment counts as neutral.
+    """
+    from_feed = news_data is None
+    records = list(parse_stock_news(_fetch_tradient_feed())) if from_feed else news_data
+    if not records:
+        return []
+    df = news_table.news_frame(records)
+    positive = news_table.filter_frame(df, exclude_sentiments=("negative", "neutral"))
+    positive = positive.assign(tradingsymbol=positive["tradingsymbol"].str.strip(),
+                               new_headline=positive["new_headline"].str[:200])
+    if from_feed:
+        # The feed's own spelling, not the lower-cased column used for filtering
+        positive = positive.assign(sentiment=[records[i]["sentiment"] for i in positive.index])
+        return news_table.frame_records(positive, ("tradingsymbol", "new_headline", "sentiment"))
+    return news_table.frame_records(positive, ("tradingsymbol", "new_headline"))
+
+class StockNewsPoller:
+    """
+    Incremental reader of the Tradient feed for frequent polling.
+
+    The state file keeps the newest `publish_ts` seen (the high-water mark)
+    and the ids of items near it. poll() skips raw items older than the mark
+    minus TRADIENT_POLL_LOOKBACK seconds before parsing them, drops ids it
+    has already emitted, and returns only the new records, so each poll
+    parses and emits O(new items). The lookback lets stories that show up
+    late with an older timestamp through; ids older than it are forgotten.
+    """
+
+    def __init__(self, state_path=TRADIENT_POLL_STATE_PATH, lookback=TRADIENT_POLL_LOOKBACK):
+        self.state_path = state_path
+        self.lookback_ms = int(lookback * 1000)
+        self.high_water_ts = 0
+        self.seen = {}  # news_id -> publish_ts
+        self._load()
+
+    def _load(self):
         try:
-            response = requests.get(TRADIENT_NEWS_URL, timeout=10)
-            response.raise_for_status()
-            news_data = response.json().get("data", {}).get("latest_news", [])
-            summarized_news = []
-            for item in news_data:
-                sm_symbol = item.get("sm_symbol", "").strip()
-                nse_scrip_code = str(item.get("nse_scrip_code", "")).strip()
-                bse_scrip_code = str(item.get("bse_scrip_code", "")).strip()
-                if (not sm_symbol or ((not nse_scrip_code or str(nse_scrip_code).strip() == "0") and (not bse_scrip_code or str(bse_scrip_code).strip() == "0"))):
-                    continue # skip non-stock news         
-                news = item.get("news_object", {})
-                title = news.get("title", "")[:200]   # limit title length
-                summary = news.get("text", "")[:1000]  # limit summary length
-                sentiment = news.get("overall_sentiment", "neutral")
-                if sentiment.lower() == "negative" or sentiment.lower() == "neutral":
-                    continue 
-                publish_ts = item.get("publish_date", 0)
-                publish_dt = datetime.fromtimestamp(publish_ts / 1000).strftime("%Y-%m-%d %H:%M:%S") if publish_ts else ""
-
-                summarized_news.append({
-                    "tradingsymbol": sm_symbol,
-                    "new_headline": title,
-                    "sentiment": sentiment,
-                    # "summary": summary,
-                    #"publish_dt":publish_dt,
-                    #"publish_ts":publish_ts,
-                })
-            return summarized_news
-        except Exception as e:
-            print(f"Error fetching news: {e}")
-            return []
-
-    summarized_news = []
-    for item in news_data:
-        tradingsymbol = item.get("tradingsymbol", "").strip()
-        sentiment = item.get("sentiment", "").strip()
-        new_headline = item.get("new_headline", "")[:200]   # limit title length
-
-        if sentiment.lower() == "negative" or sentiment.lower() == "neutral":
-            continue  # skip non-stock news
-
-        summarized_news.append({
-            "tradingsymbol": tradingsymbol,
-            "new_headline": new_headline
-            # "summary": summary
-        })   
-    return summarized_news
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.high_water_ts = int(state.get("high_water_ts", 0))
+            self.seen = {str(k): int(v) for k, v in state.get("seen", {}).items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"WARNING: ignoring unreadable poller state {self.state_path}: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"high_water_ts": self.high_water_ts, "seen": self.seen}, f)
+        os.replace(tmp, self.state_path)
+
+    def poll(self, items=None):
+        """
+        New stock news records since the last poll, oldest first. `items` is a
+        raw feed already downloaded; by default the feed is fetched.
+        """
+        if items is None:
+            items = _fetch_tradient_feed()
+        floor = self.high_water_ts - self.lookback_ms
+        recent = (item for item in items if (item.get("publish_date") or 0) >= floor)
+        new = []
+        for record in parse_stock_news(recent):
+            if record["news_id"] in self.seen:
+                continue
+            self.seen[record["news_id"]] = record["publish_ts"]
+            new.append(record)
+        if new:
+            self.high_water_ts = max(self.high_water_ts, max(r["publish_ts"] for r in new))
+            floor = self.high_water_ts - self.lookback_ms
+            self.seen = {news_id: ts for news_id, ts in self.seen.items() if ts >= floor}
+            self._save()
+        profiling.count("tradient.new_items", len(new))
+        return sorted(new, key=lambda r: r["publish_ts"])
 
 import requests
-from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from utils.article_extractor import extract_article_text
+from config import (ARTICLE_FETCH_TIMEOUT, ARTICLE_FETCH_MAX_WORKERS,
+                    ARTICLE_FETCH_PER_HOST_LIMIT, ARTICLE_FETCH_DEADLINE,
+                    ARTICLE_MAX_BYTES, ARTICLE_EXTRACTOR)
 
-def fetch_article_text(url):
+# Per-article fetch status values
+FETCH_OK = "ok"
+FETCH_EMPTY = "empty"
+FETCH_ERROR = "error"
+FETCH_TIMEOUT = "timeout"
+
+_STATUS_MESSAGES = {
+    FETCH_EMPTY: "⚠️ No readable article content found.",
+    FETCH_TIMEOUT: "⚠️ Failed to fetch article: deadline exceeded",
+}
+
+@profiling.timer("fetch.article")
+def _fetch_article(url, timeout=ARTICLE_FETCH_TIMEOUT):
+    """Fetch and parse one article. Returns a (status, text) tuple."""
     try:
-        resp = requests.get(url, timeout=10)
+        resp = http_cache.cached_get(url, timeout=timeout, max_bytes=ARTICLE_MAX_BYTES)
         resp.raise_for_status()  # raise error for bad status codes (4xx, 5xx)
         
-        soup = BeautifulSoup(resp.text, "html.parser")
-        paragraphs = [p.get_text() for p in soup.find_all("p")]
-        article_text = "\n".join(paragraphs).strip()
+        # Without a declared charset let the parser sniff <meta charset> from the bytes
+        html = resp.text if "charset" in resp.headers.get("Content-Type", "").lower() else resp.content
+        article_text = extract_article_text(html, engine=os.getenv("ARTICLE_EXTRACTOR", ARTICLE_EXTRACTOR))
         
         if not article_text:
-            return "⚠️ No readable article content found."
+            return FETCH_EMPTY, _STATUS_MESSAGES[FETCH_EMPTY]
         
-        return article_text
+        return FETCH_OK, article_text
 
     except requests.exceptions.RequestException as e:
         # handles connection errors, timeouts, invalid URL, etc.
-        return f"⚠️ Failed to fetch article: RequestException"
+        return FETCH_ERROR, f"⚠️ Failed to fetch article: RequestException"
     except Exception as e:
         # any other unexpected errors
-        return f"⚠️ Unexpected error while parsing article: Got an Exception"
+        return FETCH_ERROR, f"⚠️ Unexpected error while parsing article: Got an Exception"
+
+def fetch_article_text(url):
+    _, article_text = _fetch_article(url)
+    return article_text
+
+def fetch_article_texts(urls, max_workers=ARTICLE_FETCH_MAX_WORKERS,
+                        per_host_limit=ARTICLE_FETCH_PER_HOST_LIMIT,
+                        deadline=ARTICLE_FETCH_DEADLINE, on_result=None):
+    """
+    Fetch many article bodies concurrently.
+    At most `per_host_limit` requests hit the same host at once and the whole
+    batch stops after `deadline` seconds. Returns a list of (status, text)
+    tuples in the same order as `urls`. `on_result(index, status, text)` is
+    called as soon as each body arrives.
+    """
+    results = [(FETCH_TIMEOUT, _STATUS_MESSAGES[FETCH_TIMEOUT])] * len(urls)
+    if not urls:
+        return results
 
+    stop_at = time.monotonic() + deadline
+    # URLs wait in per-host queues and are only handed to the pool when their
+    # host has a free slot, so no pool thread ever sits waiting on a busy host
+    queues = {}
+    for i, url in enumerate(urls):
+        queues.setdefault(urlparse(url or "").netloc.lower(), deque()).append(i)
+    active = dict.fromkeys(queues, 0)
+    running = {}  # future -> (index, host)
 
+    def worker(url):
+        remaining = stop_at - time.monotonic()
+        if remaining <= 0:
+            return FETCH_TIMEOUT, _STATUS_MESSAGES[FETCH_TIMEOUT]
+        return _fetch_article(url, timeout=min(ARTICLE_FETCH_TIMEOUT, remaining))
 
-def fetch_newapi_articles(query=None):
+    def submit_ready():
+        while len(running) < max_workers:
+            ready = [host for host, queue in queues.items() if queue and active[host] < per_host_limit]
+            if not ready:
+                return
+            host = min(ready, key=lambda h: queues[h][0])  # earliest URL first
+            i = queues[host].popleft()
+            active[host] += 1
+            running[pool.submit(worker, urls[i])] = (i, host)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        submit_ready()
+        while running:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                print(f"WARNING: article fetch deadline of {deadline}s exceeded")
+                break
+            done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, host = running.pop(future)
+                active[host] -= 1
+                results[i] = future.result()
+                if on_result:
+                    on_result(i, *results[i])
+            submit_ready()
+    finally:
+        # Don't wait for stragglers, their request timeout is bounded by the deadline
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+@profiling.timer("fetch.headlines")
+def fetch_newapi_headlines(query=None):
     """
-    Fetch news.
-    Returns a list of news articles as dictionaries.
+    Fetch news headlines only (phase one).
+    Returns a list of news articles as dictionaries, in NewsAPI order, with
+    `article_text` and `fetch_status` left as None until
+    fetch_article_bodies() is called for them.
     """
     all_articles = []
 
@@ -142,7 +273,7 @@ def fetch_newapi_articles(query=None):
         "sortBy": "popularity",
         "apiKey": os.getenv("NEWS_API_KEY")
     }
-    response = requests.get(NEWS_API_URL, params=params)
+    response = http_client.get(NEWS_API_URL, params=params)
     data = response.json()
     if data.get("status") != "ok":
         print(f"Error fetching general market news: {data}")
@@ -150,26 +281,71 @@ def fetch_newapi_articles(query=None):
         for article in data.get("articles", []):
             all_articles.append({
                 "title": article.get("title"),
-                # "description": article.get("description"),
+                "description": article.get("description"),  # compared by dedup, not sent to the LLM
                 "url": article.get("url"),
-                "article_text": fetch_article_text(article.get("url")),
+                "article_text": None,
+                "fetch_status": None,
                 "urlToImage": article.get("urlToImage"),
-                "source": article.get("source", {}).get("name")
+                "source": article.get("source", {}).get("name"),
+                "publishedAt": article.get("publishedAt"),
             })
     return all_articles
 
-def filter_news(news_list,filter_keywords=None):
-    """
-    Filter news for earnings/financial related keywords.
-    Accepts a list of news dicts and returns a filtered list.
-    """
-    filter_keywords = [
-        "earnings", "quarterly results", "profit", "loss", "revenue",
-        "net income", "Q1 results", "Q2 results", "Q3 results", "Q4 results"
-    ]
-    filtered_news = []
-    for news in news_list:
-        content = (news.get("new_headline") or "") + " " + (news.get("summery") or "")
-        if any(keyword.lower() in content.lower() for keyword in filter_keywords):
-            filtered_news.append(news)
-    return filtered_news
+@profiling.timer("fetch.article_bodies")
+def fetch_article_bodies(articles, concurrent=True, on_article=None):
+    """
+    Download and parse `article_text` for the given articles (phase two).
+    Articles are updated in place and returned; ones that already have a
+    fetch_status are skipped. With `concurrent` the bodies are downloaded in
+    parallel and `on_article(article)` is called as soon as each one is ready.
+    """
+    pending = [a for a in articles if a.get("fetch_status") is None]
+
+    def store(i, status, text):
+        pending[i]["article_text"] = text
+        pending[i]["fetch_status"] = status
+        profiling.count(f"fetch.article_{status}")
+        if on_article:
+            on_article(pending[i])
+
+    urls = [a["url"] for a in pending]
+    if concurrent:
+        results = fetch_article_texts(urls, on_result=store)
+        # Articles cut off by the deadline never reached on_result
+        for i, article in enumerate(pending):
+            if article["fetch_status"] is None:
+                store(i, *results[i])
+    else:
+        for i, url in enumerate(urls):
+            store(i, *_fetch_article(url))
+    return articles
+
+@profiling.timer("fetch.newapi_articles")
+def fetch_newapi_articles(query=None, concurrent=True, on_article=None):
+    """
+    Fetch news.
+    Returns a list of news articles as dictionaries, in NewsAPI order.
+    Each article carries a `fetch_status` for its body (ok/empty/error/timeout).
+    Prefer fetch_newapi_headlines() + fetch_article_bodies() when only a few
+    of the bodies are needed.
+    """
+    all_articles = fetch_newapi_headlines(query)
+    return fetch_article_bodies(all_articles, concurrent=concurrent, on_article=on_article)
+
+EARNINGS_KEYWORDS = (
+    "earnings", "quarterly results", "profit", "loss", "revenue",
+    "net income", "Q1 results", "Q2 results", "Q3 results", "Q4 results"
+)
+
+def filter_news(news_list, filter_keywords=None):
+    """
+    Filter news for earnings/financial related keywords, or for
+    `filter_keywords` when given, matched case-insensitively anywhere in the
+    headline or summary. Accepts a list of news dicts and returns a filtered
+    list of the same dicts.
+    """
+    if not news_list:
+        return []
+    df = news_table.news_frame(news_list)
+    mask = news_table.keyword_mask(df, filter_keywords or EARNINGS_KEYWORDS)
+    return [news_list[i] for i in mask[mask].index]
@@ -0,0 +1,82 @@
+# utils/news_ranker.py
+import os
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from config import NEWS_RANK_TOP_K, NEWS_RANK_WEIGHTS, NEWS_RANK_HALF_LIFE_HOURS
+from utils.news_dedup import story_text
+
+TOP_K = int(os.getenv("NEWS_RANK_TOP_K", NEWS_RANK_TOP_K))
+
+def _scaled(values):
+    """Min-max scale to 0..1; a constant column carries no signal and becomes 0."""
+    spread = values.max() - values.min()
+    if not spread or np.isnan(spread):
+        return pd.Series(0.0, index=values.index)
+    return (values - values.min()) / spread
+
+def _centrality(texts):
+    """
+    Cosine similarity of each story's word TF-IDF vector with the mean of all
+    of them: how much a story is about what the whole feed is covering.
+    """
+    if len(texts) < 2 or not any(texts):
+        return np.zeros(len(texts))
+    try:
+        vectors = TfidfVectorizer(stop_words="english", sublinear_tf=True).fit_transform(texts)
+    except ValueError:  # only stop words
+        return np.zeros(len(texts))
+    centroid = np.asarray(vectors.mean(axis=0)).ravel()
+    norm = np.linalg.norm(centroid)
+    return vectors @ centroid / norm if norm else np.zeros(len(texts))
+
+def score_stories(articles, now=None):
+    """
+    Feature table and score of each story, one row per article in input order.
+    Features, each scaled to 0..1:
+      popularity  position in the NewsAPI feed, which is sorted by popularity
+      coverage    other outlets that ran the story (`duplicates` from dedup)
+      source      how many stories of the feed the story's outlet published
+      recency     exponential decay of `publishedAt`, NEWS_RANK_HALF_LIFE_HOURS
+      centrality  TF-IDF similarity with the feed as a whole
+    The score is their NEWS_RANK_WEIGHTS weighted sum.
+    """
+    n = len(articles)
+    df = pd.DataFrame({
+        "position": np.arange(n),
+        "duplicates": [a.get("duplicates", 0) for a in articles],
+        "source_name": [a.get("source") or "" for a in articles],
+        "published": pd.to_datetime([a.get("publishedAt") for a in articles], utc=True, errors="coerce"),
+    })
+    now = now or pd.Timestamp.now(tz="UTC")
+    age_hours = (now - df["published"]).dt.total_seconds().clip(lower=0) / 3600
+
+    df["popularity"] = 1 - df["position"] / max(n - 1, 1)
+    df["coverage"] = _scaled(np.log1p(df["duplicates"]))
+    df["source"] = _scaled(np.log1p(df.groupby("source_name")["source_name"].transform("size")))
+    # Stories without a timestamp rank as old as the oldest one
+    recency = 0.5 ** (age_hours / NEWS_RANK_HALF_LIFE_HOURS)
+    df["recency"] = recency.fillna(recency.min() if recency.notna().any() else 0)
+    df["centrality"] = _scaled(pd.Series(_centrality([story_text(a) for a in articles])))
+    df["score"] = sum(df[feature] * weight for feature, weight in NEWS_RANK_WEIGHTS.items())
+    return df
+
+def top_stories(articles, k=TOP_K, now=None):
+    """
+    Keep the k best scored stories, best first, for the selector prompt.
+    Logs the score distribution and the cut-off so k can be tuned.
+    k of 0 (or at least the number of stories) keeps every story in feed order,
+    and the distribution is still logged.
+    """
+    if not articles:
+        return articles
+    scores = score_stories(articles, now)["score"]
+    ranked = scores.sort_values(ascending=False, kind="stable")
+    keep_all = not k or len(articles) <= k
+    cutoff = "none" if keep_all else f"{ranked.iloc[k - 1]:.3f}"
+    q = scores.quantile([0, 0.25, 0.5, 0.75, 1]).round(3).tolist()
+    print(f"INFO: ranking kept {len(articles) if keep_all else k} of {len(articles)} stories, "
+          f"score min/p25/median/p75/max {q}, cut-off {cutoff}")
+    if keep_all:
+        return articles
+    return [articles[i] for i in ranked.index[:k]]
@@ -0,0 +1,93 @@
+# utils/news_table.py
+import re
+import time
+from functools import lru_cache
+import pandas as pd
+
+COLUMNS = ("news_id", "tradingsymbol", "new_headline", "summary", "sentiment", "publish_dt", "publish_ts")
+TEXT_COLUMNS = ("new_headline", "summary")
+
+def news_frame(records):
+    """
+    DataFrame of news records (parse_stock_news() / fetch_all_stock_news()
+    dicts), one column per field. Missing fields become empty, `sentiment`
+    is lower-cased and `publish_ts` (epoch ms) is an integer column.
+    Old records with the misspelled `summery` key fill `summary`.
+    """
+    df = pd.DataFrame.from_records(list(records))
+    if "summary" not in df and "summery" in df:
+        df = df.rename(columns={"summery": "summary"})
+    for column in COLUMNS:
+        if column not in df:
+            df[column] = 0 if column == "publish_ts" else ""
+    for column in ("tradingsymbol", "new_headline", "summary", "sentiment"):
+        df[column] = df[column].fillna("").astype(str)
+    df["sentiment"] = df["sentiment"].str.strip().str.lower()
+    df["publish_ts"] = pd.to_numeric(df["publish_ts"], errors="coerce").fillna(0).astype("int64")
+    return df
+
+def frame_records(df, columns=None):
+    """The rows of `df` as dicts, optionally restricted to `columns`."""
+    if columns is not None:
+        df = df[list(columns)]
+    return df.to_dict("records")
+
+@lru_cache(maxsize=32)
+def keyword_pattern(keywords):
+    """
+    One regex matching any of `keywords` (a tuple) as a substring of
+    lower-cased text. Longer keywords come first, so overlapping ones match
+    whole. The text is lower-cased rather than using re.IGNORECASE, which
+    makes every match attempt several times slower.
+    """
+    alternatives = sorted({k.strip().lower() for k in keywords if k and k.strip()}, key=len, reverse=True)
+    if not alternatives:
+        return None
+    return re.compile("|".join(map(re.escape, alternatives)))
+
+def keyword_mask(df, keywords, columns=TEXT_COLUMNS):
+    """Rows whose text columns contain any of `keywords`, case-insensitively."""
+    pattern = keyword_pattern(tuple(keywords))
+    if pattern is None or df.empty:
+        return pd.Series(False, index=df.index)
+    text = df[columns[0]]
+    for column in columns[1:]:
+        text = text + "\n" + df[column]
+    return text.str.lower().str.contains(pattern, regex=True)
+
+def sentiment_mask(df, include=None, exclude=None):
+    """Rows whose sentiment is in `include` (when given) and not in `exclude`. Empty counts as neutral."""
+    sentiment = df["sentiment"].replace("", "neutral")
+    mask = pd.Series(True, index=df.index)
+    if include is not None:
+        mask &= sentiment.isin([s.lower() for s in include])
+    if exclude is not None:
+        mask &= ~sentiment.isin([s.lower() for s in exclude])
+    return mask
+
+def time_mask(df, since_ts=None, until_ts=None, within=None):
+    """
+    Rows published in [since_ts, until_ts) (epoch ms), or in the last
+    `within` seconds. Rows without a timestamp only pass an open window.
+    """
+    if within is not None:
+        since_ts = max(since_ts or 0, int((time.time() - within) * 1000))
+    ts = df["publish_ts"]
+    mask = pd.Series(True, index=df.index)
+    if since_ts is not None:
+        mask &= ts >= since_ts
+    if until_ts is not None:
+        mask &= (ts < until_ts) & (ts > 0)
+    return mask
+
+def filter_frame(df, keywords=None, include_sentiments=None, exclude_sentiments=None,
+                 since_ts=None, until_ts=None, within=None):
+    """Rows of `df` passing every given filter, all evaluated column-wise."""
+    mask = pd.Series(True, index=df.index)
+    if keywords:
+        mask &= keyword_mask(df, keywords)
+    if include_sentiments is not None or exclude_sentiments is not None:
+        mask &= sentiment_mask(df, include_sentiments, exclude_sentiments)
+    if since_ts is not None or until_ts is not None or within is not None:
+        mask &= time_mask(df, since_ts, until_ts, within)
+    return df[mask]
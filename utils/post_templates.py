@@ -0,0 +1,36 @@
+# utils/post_templates.py
+import os
+import threading
+
+_lock = threading.Lock()
+_templates = {}  # (name, params, asset signatures) -> whatever the builder returned
+_stats = {"hits": 0, "builds": 0}
+
+def _asset_signature(path):
+    """(path, mtime, size) of an asset file, so replacing a logo or font rebuilds its templates."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, st.st_mtime_ns, st.st_size)
+
+def get_template(name, build, assets=(), **params):
+    """
+    build(**params) run once per process for each name, params and asset
+    version, then served from memory. The result is shared between posts
+    and threads: copy images before drawing on them.
+    """
+    key = (name, tuple(sorted(params.items())), tuple(_asset_signature(p) for p in assets))
+    with _lock:
+        template = _templates.get(key)
+        if template is not None:
+            _stats["hits"] += 1
+            return template
+        # Built under the lock so concurrent renders do not build it twice
+        template = _templates[key] = build(**params)
+        _stats["builds"] += 1
+        return template
+
+def template_cache_stats():
+    with _lock:
+        return dict(_stats, cached=len(_templates))
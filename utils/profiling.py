@@ -0,0 +1,113 @@
+# utils/profiling.py
+import os
+import json
+import time
+import datetime
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from config import PROFILE_REPORT_PATH
+
+REPORT_PATH = os.getenv("PROFILE_REPORT_PATH", PROFILE_REPORT_PATH)
+CPROFILE_PATH = os.getenv("PROFILE_CPROFILE", "")  # dump cProfile stats of the run to this file when set
+TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "") not in ("", "0")
+TRACEMALLOC_TOP = 15  # allocation sites listed in the report
+
+_lock = threading.Lock()
+_stages = {}    # stage -> {"count", "total", "max"} in seconds
+_counters = {}
+_run = {"started": None, "profiler": None}
+
+@contextmanager
+def timer(stage):
+    """Time the block (or, as a decorator, each call) under `stage`. Repeats add up."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            entry = _stages.setdefault(stage, {"count": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+
+def count(name, n=1):
+    """Add n to a run counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def start_run():
+    """
+    Start the run clock, and cProfile / tracemalloc when switched on with
+    PROFILE_CPROFILE=<file> / PROFILE_TRACEMALLOC=1. cProfile only sees the
+    thread that calls this (the event loop), not render or fetch threads.
+    """
+    _run["started"] = time.perf_counter()
+    if TRACEMALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if CPROFILE_PATH:
+        _run["profiler"] = cProfile.Profile()
+        _run["profiler"].enable()
+
+def timing_report():
+    """Stage timings and counters of this process as a JSON-ready dict."""
+    with _lock:
+        stages = {
+            name: {
+                "count": entry["count"],
+                "total_s": round(entry["total"], 4),
+                "mean_ms": round(entry["total"] / entry["count"] * 1000, 2),
+                "max_ms": round(entry["max"] * 1000, 2),
+            }
+            for name, entry in sorted(_stages.items())
+        }
+        counters = dict(sorted(_counters.items()))
+    report = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "wall_s": round(time.perf_counter() - _run["started"], 3) if _run["started"] else None,
+        "stages": stages,
+        "counters": counters,
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:TRACEMALLOC_TOP]
+        report["tracemalloc"] = {
+            "current_kb": current // 1024,
+            "peak_kb": peak // 1024,
+            "top": [{"where": str(stat.traceback), "size_kb": stat.size // 1024, "count": stat.count}
+                    for stat in top],
+        }
+    return report
+
+def finish_run(path=None):
+    """Stop the profilers, write the JSON report and print its stage table to the log."""
+    profiler, _run["profiler"] = _run["profiler"], None
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(CPROFILE_PATH)
+        print(f"INFO: cProfile stats written to {CPROFILE_PATH}")
+
+    report = timing_report()
+    if TRACEMALLOC and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    path = path or REPORT_PATH
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    except OSError as e:
+        print(f"WARNING: could not write timing report {path}: {e}")
+
+    print(f"INFO: timing report ({path}), run {report['wall_s']}s")
+    print(f"INFO: {'stage':<28} {'count':>6} {'total s':>9} {'mean ms':>9} {'max ms':>9}")
+    for name, entry in report["stages"].items():
+        print(f"INFO: {name:<28} {entry['count']:>6} {entry['total_s']:>9.3f} "
+              f"{entry['mean_ms']:>9.1f} {entry['max_ms']:>9.1f}")
+    if report["counters"]:
+        print(f"INFO: counters {report['counters']}")
+    if "tracemalloc" in report:
+        print(f"INFO: tracemalloc peak {report['tracemalloc']['peak_kb']} KB")
+    return report
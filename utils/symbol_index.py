@@ -0,0 +1,161 @@
+# utils/symbol_index.py
+import io
+import os
+import re
+import pickle
+import threading
+from datetime import date
+import pandas as pd
+from config import NSE_EQUITY_LIST_URL, INSTRUMENT_LIST_URL, SYMBOL_INDEX_PATH
+from utils import http_client, profiling
+
+# NSE archives refuse requests without a browser-like agent
+NSE_HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko)"}
+FORMAT_VERSION = 1
+EQUITY_SEGMENTS = ("NSE", "BSE")
+_NAME_NOISE = re.compile(r"\b(limited|ltd|the|and|co|company|corporation|corp|inc|india)\b|[^a-z0-9 ]")
+
+_lock = threading.Lock()
+_index = None
+_checked_on = None  # day the stored index was last checked, so a failing download is retried once a day
+
+def normalize_name(name):
+    """Company name key: lower-case, no punctuation or legal suffixes ("Tata Motors Ltd." -> "tata motors")."""
+    return " ".join(_NAME_NOISE.sub(" ", (name or "").lower()).split())
+
+# ----------------- Building -----------------
+def _download_equities():
+    """NSE equity master as (symbol, company name, ISIN, series) rows."""
+    resp = http_client.get(NSE_EQUITY_LIST_URL, headers=NSE_HEADERS)
+    resp.raise_for_status()
+    df = pd.read_csv(io.BytesIO(resp.content), dtype=str).rename(columns=str.strip)
+    df = df.rename(columns={"SYMBOL": "symbol", "NAME OF COMPANY": "name", "ISIN NUMBER": "isin", "SERIES": "series"})
+    return df[["symbol", "name", "isin", "series"]].fillna("").apply(lambda col: col.str.strip())
+
+def _download_instruments():
+    """Cash-segment rows of the Angel One scrip master: (exchange, symbol, name, token)."""
+    resp = http_client.get(INSTRUMENT_LIST_URL)
+    resp.raise_for_status()
+    df = pd.DataFrame.from_records(resp.json(), columns=["token", "symbol", "name", "exch_seg", "instrumenttype"])
+    df = df[df["exch_seg"].isin(EQUITY_SEGMENTS) & (df["instrumenttype"].fillna("") == "")]
+    # NSE lists RELIANCE-EQ / RELIANCE-BE, BSE plain RELIANCE; the ticker is the part before the series
+    df = df.assign(ticker=df["symbol"].str.replace(r"-[A-Z0-9]{1,2}$", "", regex=True).str.strip().str.upper())
+    return df[["exch_seg", "ticker", "name", "token"]].astype(str)
+
+def build_index(equities, instruments):
+    """
+    Lookup tables from the two masters. Each security is one tuple
+    (symbol, company name, ISIN, NSE token, BSE code); the maps point into
+    that list, so the pickle stores every string once.
+    """
+    nse = instruments[instruments["exch_seg"] == "NSE"].drop_duplicates("ticker").set_index("ticker")["token"]
+    bse = instruments[instruments["exch_seg"] == "BSE"].drop_duplicates("ticker").set_index("ticker")["token"]
+    equities = equities.drop_duplicates("symbol")
+    symbols = pd.Index(equities["symbol"].str.upper()).union(pd.Index(nse.index)).union(pd.Index(bse.index))
+    names = equities.set_index(equities["symbol"].str.upper())
+    bse_names = instruments[instruments["exch_seg"] == "BSE"].drop_duplicates("ticker").set_index("ticker")["name"]
+
+    records, by_symbol, by_nse_code, by_bse_code, by_name = [], {}, {}, {}, {}
+    for symbol in symbols:
+        if not symbol:
+            continue
+        name = names["name"].get(symbol) or bse_names.get(symbol) or ""
+        record = (symbol, name, names["isin"].get(symbol, ""), nse.get(symbol, ""), bse.get(symbol, ""))
+        i = by_symbol[symbol] = len(records)
+        records.append(record)
+        if record[3]:
+            by_nse_code[record[3]] = i
+        if record[4]:
+            by_bse_code[record[4]] = i
+        by_name.setdefault(normalize_name(name), i)
+    by_name.pop("", None)
+    return {
+        "version": FORMAT_VERSION,
+        "built_on": date.today().isoformat(),
+        "records": records,
+        "by_symbol": by_symbol,
+        "by_nse_code": by_nse_code,
+        "by_bse_code": by_bse_code,
+        "by_name": by_name,
+    }
+
+@profiling.timer("symbols.refresh")
+def refresh_index(path=SYMBOL_INDEX_PATH):
+    """Download both masters, rebuild the index and store it at `path`."""
+    index = build_index(_download_equities(), _download_instruments())
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    print(f"INFO: symbol index rebuilt with {len(index['records'])} securities")
+    return index
+
+def _load(path):
+    try:
+        with open(path, "rb") as f:
+            index = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        print(f"WARNING: ignoring unreadable symbol index {path}: {e}")
+        return None
+    return index if isinstance(index, dict) and index.get("version") == FORMAT_VERSION else None
+
+def get_index(path=SYMBOL_INDEX_PATH):
+    """
+    The symbol index, loaded once per process. It is rebuilt from the masters
+    when the stored one is from an earlier day; if that download fails the
+    stale index is used, or an empty one when there is none.
+    """
+    global _index, _checked_on
+    today = date.today().isoformat()
+    with _lock:
+        if _index is not None and _checked_on == today:
+            return _index
+        index = _load(path)
+        if index is None or index["built_on"] != today:
+            try:
+                index = refresh_index(path)
+            except Exception as e:
+                print(f"ERROR : symbol index refresh failed: {e}")
+                index = index or build_index(pd.DataFrame(columns=["symbol", "name", "isin", "series"]),
+                                             pd.DataFrame(columns=["exch_seg", "ticker", "name", "token"]))
+        _index, _checked_on = index, today
+        return _index
+
+# ----------------- Lookups -----------------
+SECURITY_FIELDS = ("symbol", "company_name", "isin", "nse_code", "bse_code")
+
+def _record(index, i):
+    return None if i is None else dict(zip(SECURITY_FIELDS, index["records"][i]))
+
+def by_symbol(symbol):
+    """Security dict for an NSE/BSE ticker, or None."""
+    index = get_index()
+    return _record(index, index["by_symbol"].get((symbol or "").strip().upper()))
+
+def by_scrip_code(nse_code=None, bse_code=None):
+    """Security dict for an NSE token or a BSE scrip code, or None."""
+    index = get_index()
+    i = index["by_nse_code"].get(str(nse_code or "").strip())
+    if i is None:
+        i = index["by_bse_code"].get(str(bse_code or "").strip())
+    return _record(index, i)
+
+def by_company_name(name):
+    """Security dict for a company name, compared without case, punctuation or "Ltd"-style suffixes."""
+    index = get_index()
+    return _record(index, index["by_name"].get(normalize_name(name)))
+
+def enrich_news(records):
+    """
+    Add `company_name` and `isin` to stock news records in place, looked up
+    by `tradingsymbol`, then by scrip code. Returns the records.
+    """
+    for record in records:
+        security = by_symbol(record.get("tradingsymbol")) or by_scrip_code(record.get("nse_scrip_code"),
+                                                                          record.get("bse_scrip_code"))
+        record["company_name"] = security["company_name"] if security else ""
+        record["isin"] = security["isin"] if security else ""
+    return records
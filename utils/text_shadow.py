@@ -0,0 +1,71 @@
+# utils/text_shadow.py
+from PIL import Image, ImageDraw, ImageFilter
+
+BLUR_MARGIN = 3  # blur radii of transparent border kept around the shadows
+
+class ShadowLayer:
+    """
+    Soft drop shadows for a group of text lines (or icon masks), rendered
+    with one blur and one composite. Every shadow is stamped `passes` times,
+    one pixel further down-right each time, starting `offset` px from the
+    item. Only the union of the stamped boxes, padded by BLUR_MARGIN blur
+    radii, is allocated and blurred, instead of the whole canvas per line.
+    """
+
+    def __init__(self, canvas_size, blur_radius=6, passes=4, offset=4, fill=(0, 0, 0, 200)):
+        self.canvas_size = canvas_size
+        self.blur_radius = blur_radius
+        self.passes = passes
+        self.offset = offset
+        self.fill = fill
+        self._items = []  # (xy, text, font, mask)
+        self._box = None
+
+    def _extend(self, left, top, right, bottom):
+        spread = self.passes - 1
+        box = (left + self.offset, top + self.offset,
+               right + self.offset + spread, bottom + self.offset + spread)
+        if self._box is None:
+            self._box = box
+        else:
+            self._box = (min(self._box[0], box[0]), min(self._box[1], box[1]),
+                         max(self._box[2], box[2]), max(self._box[3], box[3]))
+
+    def add_text(self, xy, text, font):
+        """Queue the shadow of `text` drawn at `xy`."""
+        x, y = xy
+        left, top, right, bottom = font.getbbox(text)
+        self._extend(x + left, y + top, x + right, y + bottom)
+        self._items.append((xy, text, font, None))
+
+    def add_mask(self, xy, mask):
+        """Queue the shadow of an "L" mask (e.g. an icon's alpha) pasted at integer `xy`."""
+        x, y = xy
+        self._extend(x, y, x + mask.width, y + mask.height)
+        self._items.append((xy, None, None, mask))
+
+    def composite(self, img):
+        """Blur the queued shadows once and alpha-composite them onto the RGBA `img` in place."""
+        if self._box is None:
+            return
+        pad = int(self.blur_radius * BLUR_MARGIN) + 2  # +2 for anti-aliasing outside the bboxes
+        width, height = self.canvas_size
+        x0, y0 = max(0, int(self._box[0]) - pad), max(0, int(self._box[1]) - pad)
+        x1, y1 = min(width, int(self._box[2]) + pad + 1), min(height, int(self._box[3]) + pad + 1)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        layer = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
+        layer_draw = ImageDraw.Draw(layer)
+        for (x, y), text, font, mask in self._items:
+            if mask is not None:
+                stamp = Image.new("RGBA", mask.size, self.fill)
+            for step in range(self.passes):
+                pos = (x - x0 + self.offset + step, y - y0 + self.offset + step)
+                if mask is None:
+                    layer_draw.text(pos, text, font=font, fill=self.fill)
+                else:
+                    layer.paste(stamp, pos, mask)
+        layer = layer.filter(ImageFilter.GaussianBlur(self.blur_radius))
+        img.alpha_composite(layer, (x0, y0))
+        self._items, self._box = [], None